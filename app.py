@@ -4,8 +4,10 @@ import streamlit as st
 import pandas as pd
 from lib import actions
 from lib import auth
-from lib.data_loader import load_csv, get_current_csv_path
-from lib.filters import build_options, apply_filters
+from lib.data_loader import load_dataset, get_current_csv_path, start_source_poller, LeadDataset, SOURCE_POLL
+from lib.filters import build_options, apply_filters, facet_counts, filter_index, result_cache_stats
+from lib.search import search_index, fuzzy_index
+from lib import priority
 from lib.ui_components import header, filter_bar, lead_list, detail_panel, notes_panel_top, notes_panel_rest, summary_bar, bulk_copy_panel, bottom_nav, highlight_start, highlight_end
 
 st.set_page_config(page_title="W3C Sales Dashboard", layout="wide")
@@ -35,6 +37,11 @@ def load_announcements() -> Any:
         return []
 
 
+@st.cache_data(show_spinner=False)
+def load_priority_weights() -> Dict[str, float]:
+    return priority.load_weights()
+
+
 def save_templates(tpl: Dict[str, str]):
     with open("data/templates.json", "w", encoding="utf-8") as f:
         json.dump(tpl, f, indent=2)
@@ -50,6 +57,10 @@ def save_announcements(items: Any):
         json.dump(items, f, indent=2)
     st.cache_data.clear()
 
+def save_priority_weights(weights: Dict[str, float]):
+    priority.save_weights(weights)
+    st.cache_data.clear()
+
 
 def login_view() -> Dict[str, Any] | None:
     st.title("W3C Dashboard — Sign In")
@@ -118,16 +129,12 @@ def page_main(user: Dict[str, Any], df: pd.DataFrame):
     if st.button("Open Operational Workspace"):
         st.session_state["navigate_to"] = "Level 2: Workspace"
         st.rerun()
-    # Daily metrics from actions
+    # Daily metrics from the activity rollups
     from datetime import date
     today = date.today().isoformat()
-    start = f"{today}T00:00:00+00:00"; end = f"{today}T23:59:59+00:00"
-    acts = actions.get_actions_by_range(start, end)
-    calls = sum(1 for a in acts if a["action_type"] == "call")
-    texts = sum(1 for a in acts if a["action_type"] in ("pre_call_sms","post_call_sms"))
-    # Follow-ups: notes with follow_up_date == today
-    notes = actions.get_notes_by_range(start, end)
-    followups = sum(1 for n in notes if (n["follow_up_date"] or "").startswith(today))
+    # Follow-ups: notes written today with follow_up_date == today
+    m = actions.daily_metrics(today)
+    calls, texts, followups = m["calls"], m["texts"], m["followups"]
     unassigned = (df["owner"] == "Wolf Carports").sum() if "owner" in df.columns else 0
     c1,c2,c3,c4 = st.columns(4)
     c1.metric("Calls (today)", calls)
@@ -137,17 +144,21 @@ def page_main(user: Dict[str, Any], df: pd.DataFrame):
     bottom_nav()
 
 
-def page_workspace(user: Dict[str, Any], df: pd.DataFrame, templates: Dict[str, str]):
+def page_workspace(user: Dict[str, Any], dataset: LeadDataset, templates: Dict[str, str]):
     header(user)
-    opts = build_options(df)
-    params = filter_bar(opts, is_manager=(user.get("role") == "manager"))
-    fdf, label = apply_filters(df, user, params["readiness"], params["lead_stage"], params["customer_stage"], params["states"], params["engagement"], params["text_query"], params["owners_override"], params["sort_by"], params["sort_asc"])    
+    df = dataset.df
+    index = filter_index(dataset)
+    search = search_index(dataset)
+    opts = build_options(df, index)
+    facets = lambda p: facet_counts(df, user, p["readiness"], p["lead_stage"], p["customer_stage"], p["states"], p["engagement"], p["text_query"], p["owners_override"], index=index, search=search, fuzzy=fuzzy_index(dataset) if p["fuzzy"] else None, version=dataset.version)
+    params = filter_bar(opts, is_manager=(user.get("role") == "manager"), facets=facets)
+    fdf, label = apply_filters(df, user, params["readiness"], params["lead_stage"], params["customer_stage"], params["states"], params["engagement"], params["text_query"], params["owners_override"], params["sort_by"], params["sort_asc"], index=index, search=search, fuzzy=fuzzy_index(dataset) if params["fuzzy"] else None, version=dataset.version, priority=priority.priority_scores(dataset, load_priority_weights()) if params["sort_by"] == priority.PRIORITY_SORT else None)
     summary_bar(label, len(fdf))
     sel_id = st.session_state.get("selected_id")
-    sel_id = lead_list(fdf, sel_id)
+    sel_id = lead_list(fdf, sel_id, dataset.positions_of)
     if sel_id:
         st.session_state["selected_id"] = sel_id
-        row = fdf[fdf["EntityId"] == sel_id].iloc[0]
+        row = dataset.detail_row(df.iloc[int(dataset.positions_of([sel_id])[0])])
         highlight_start()
         detail_panel(user, row, templates)
         notes_panel_top(user, sel_id)
@@ -348,11 +359,31 @@ def page_announcements(user: Dict[str, Any], items: Any):
     bottom_nav()
 
 
-def page_system(user: Dict[str, Any]):
+def page_system(user: Dict[str, Any], dataset: LeadDataset):
     header(user)
     from lib.data_loader import get_current_csv_path
     st.write("Data source:", get_current_csv_path())
-    st.write("Overlay DB:", "data/state.db")
+    st.write("Dataset version:", dataset.version, f"({len(dataset.df):,} rows)")
+    before = dataset.stats.get("memory_before")
+    after = dataset.stats.get("memory_after")
+    if before and after:
+        st.write("Lead frame memory:", f"{before / 2**20:,.1f} MB → {after / 2**20:,.1f} MB ({1 - after / before:.0%} smaller with compact dtypes)")
+    resident = dataset.stats.get("memory_resident")
+    if resident and dataset.detail_source:
+        st.write("Resident (hot columns):", f"{resident / 2**20:,.1f} MB; detail columns are read per lead from the snapshot")
+    ingest = dataset.stats.get("ingest")
+    if ingest:
+        st.write("Last ingest:", f"{ingest['added']:,} added, {ingest['changed']:,} changed, {ingest['removed']:,} removed, {ingest['reused']:,} reused")
+    rc = result_cache_stats()
+    lookups = rc["hits"] + rc["misses"]
+    st.write("Filter result cache:", f"{rc['hits']:,} hits / {rc['misses']:,} misses ({rc['hits'] / lookups:.0%} hit rate)" if lookups else "no lookups yet",
+             f"· {rc['entries']} entries, {rc['bytes'] / 2**10:,.0f} KB, {rc['evictions']:,} evicted")
+    st.write("Overlay DB:", "data/state.db", f"(schema v{actions.schema_version()})")
+    ac = actions.activity_cache_stats()
+    st.write("Entity activity cache:", f"{ac['hits']:,} hits / {ac['misses']:,} misses · {ac['entities']:,} entities, {ac['evictions']:,} evicted")
+    ws = actions.writer_stats()
+    if ws:
+        st.write("Group commit:", f"{ws['writes']:,} writes in {ws['batches']:,} transactions · {ws['pending']} pending")
     st.write("Users store:", "data/users.json")
     bottom_nav()
 
@@ -364,6 +395,10 @@ def page_reports(user: Dict[str, Any]):
     today = pd.Timestamp.utcnow().date()
     start = st.date_input("Start date", value=today)
     end = st.date_input("End date", value=today)
+    by_rep = actions.activity_by_rep(start.isoformat(), end.isoformat())
+    if by_rep:
+        st.markdown("#### Activity by rep")
+        st.dataframe(pd.DataFrame([dict(r) for r in by_rep]).pivot(index="user_id", columns="action_type", values="n").fillna(0).astype(int), use_container_width=True)
     if st.button("Export actions CSV"):
         s = f"{start.isoformat()}T00:00:00+00:00"; e = f"{end.isoformat()}T23:59:59+00:00"
         rows = actions.get_actions_by_range(s,e)
@@ -442,6 +477,15 @@ def page_settings(user: Dict[str, Any], templates: Dict[str, Any], resources: Di
                     st.success("Announcements saved")
                 except Exception as e:
                     st.error(f"Invalid JSON: {e}")
+        st.markdown("### Priority weights")
+        with st.form("priority_weights"):
+            weights = load_priority_weights()
+            cols = st.columns(len(priority.DEFAULT_WEIGHTS))
+            new = {k: c.number_input(k.capitalize(), min_value=0.0, max_value=10.0, step=0.05, value=float(weights.get(k, 0.0)))
+                   for c, k in zip(cols, priority.DEFAULT_WEIGHTS)}
+            if st.form_submit_button("Save Weights"):
+                save_priority_weights(new)
+                st.success("Priority weights saved")
     bottom_nav()
 
 
@@ -454,7 +498,10 @@ def main():
         user = st.session_state.get("user")
 
     choice = sidebar_nav()
-    df = load_csv()
+    if SOURCE_POLL:
+        start_source_poller()
+    dataset = load_dataset()
+    df = dataset.df
     templates = load_templates()
     resources = load_resources()
     announcements = load_announcements()
@@ -462,13 +509,13 @@ def main():
     if choice == "Level 1: Main":
         page_main(user, df)
     elif choice == "Level 2: Workspace":
-        page_workspace(user, df, templates)
+        page_workspace(user, dataset, templates)
     elif choice == "Level 3: Resources":
         page_resources(user, resources)
     elif choice == "Level 4: Announcements":
         page_announcements(user, announcements)
     elif choice == "Level 5: System & Data":
-        page_system(user)
+        page_system(user, dataset)
     elif choice == "Reports":
         page_reports(user)
     elif choice == "Settings":
@@ -480,4 +527,6 @@ def main():
 
 if __name__ == "__main__":
     actions.init_db()
+    if actions.GROUP_COMMIT:
+        actions.start_writer()
     main()
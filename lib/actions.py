@@ -1,13 +1,33 @@
+import atexit
 import json
+import logging
 import os
+import queue
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = "data/state.db"
+# Per-connection LRU of compiled statements; the module's SQL texts are fixed, so every call after
+# the first on a thread reuses a prepared statement
+STATEMENT_CACHE_SIZE = 64
+
+# Bumped on every readiness save in this process; part of the derived dataset cache key
+_READINESS_VERSION = 0
 
+# Schema migrations: MIGRATIONS[i] upgrades a database from PRAGMA user_version i to i + 1. Each
+# entry is a list of SQL statements or callables taking the connection; all steps must be idempotent
+# so a database created before versioning (user_version 0, tables already present) upgrades cleanly.
+# Append new migrations; never edit shipped ones.
+
+# v1: the original tables
 SCHEMA = [
-    "PRAGMA journal_mode=WAL;",
     "CREATE TABLE IF NOT EXISTS actions (\n        id INTEGER PRIMARY KEY AUTOINCREMENT,\n        ts TEXT NOT NULL,\n        user_id TEXT NOT NULL,\n        entity_id TEXT NOT NULL,\n        action_type TEXT NOT NULL,\n        payload TEXT\n    );",
     "CREATE INDEX IF NOT EXISTS idx_actions_ts ON actions(ts);",
     "CREATE INDEX IF NOT EXISTS idx_actions_entity ON actions(entity_id);",
@@ -18,159 +38,543 @@ SCHEMA = [
     "CREATE INDEX IF NOT EXISTS idx_readiness_level ON readiness(level);"
 ]
 
+
+# Activity rollups: per (UTC day, rep, action type) action counts and per (day, rep, follow-up day) note
+# counts, kept current by triggers so dashboard metrics read a handful of rows instead of scanning the day
+ROLLUP_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS action_rollup (\n        day TEXT NOT NULL,\n        user_id TEXT NOT NULL,\n        action_type TEXT NOT NULL,\n        n INTEGER NOT NULL,\n        PRIMARY KEY (day, user_id, action_type)\n    ) WITHOUT ROWID;",
+    "CREATE TABLE IF NOT EXISTS note_rollup (\n        day TEXT NOT NULL,\n        user_id TEXT NOT NULL,\n        follow_up_day TEXT NOT NULL,\n        n INTEGER NOT NULL,\n        PRIMARY KEY (day, user_id, follow_up_day)\n    ) WITHOUT ROWID;",
+    "CREATE TRIGGER IF NOT EXISTS trg_actions_rollup_ins AFTER INSERT ON actions BEGIN\n        INSERT INTO action_rollup(day, user_id, action_type, n) VALUES(substr(NEW.ts, 1, 10), NEW.user_id, NEW.action_type, 1)\n        ON CONFLICT(day, user_id, action_type) DO UPDATE SET n = n + 1;\n    END;",
+    "CREATE TRIGGER IF NOT EXISTS trg_actions_rollup_del AFTER DELETE ON actions BEGIN\n        UPDATE action_rollup SET n = n - 1 WHERE day = substr(OLD.ts, 1, 10) AND user_id = OLD.user_id AND action_type = OLD.action_type;\n    END;",
+    "CREATE TRIGGER IF NOT EXISTS trg_notes_rollup_ins AFTER INSERT ON notes BEGIN\n        INSERT INTO note_rollup(day, user_id, follow_up_day, n) VALUES(substr(NEW.ts, 1, 10), NEW.user_id, COALESCE(substr(NEW.follow_up_date, 1, 10), ''), 1)\n        ON CONFLICT(day, user_id, follow_up_day) DO UPDATE SET n = n + 1;\n    END;",
+    "CREATE TRIGGER IF NOT EXISTS trg_notes_rollup_del AFTER DELETE ON notes BEGIN\n        UPDATE note_rollup SET n = n - 1 WHERE day = substr(OLD.ts, 1, 10) AND user_id = OLD.user_id AND follow_up_day = COALESCE(substr(OLD.follow_up_date, 1, 10), '');\n    END;",
+]
+
+
+def rebuild_rollups(conn: sqlite3.Connection) -> None:
+    # Recompute both rollups from the base tables (backfill, or repair after manual edits)
+    conn.execute("DELETE FROM action_rollup")
+    conn.execute(
+        "INSERT INTO action_rollup(day, user_id, action_type, n)\n"
+        "         SELECT substr(ts, 1, 10), user_id, action_type, COUNT(*) FROM actions GROUP BY 1, 2, 3"
+    )
+    conn.execute("DELETE FROM note_rollup")
+    conn.execute(
+        "INSERT INTO note_rollup(day, user_id, follow_up_day, n)\n"
+        "         SELECT substr(ts, 1, 10), user_id, COALESCE(substr(follow_up_date, 1, 10), ''), COUNT(*) FROM notes GROUP BY 1, 2, 3"
+    )
+
+
+MIGRATIONS: List[List[Any]] = [
+    SCHEMA,
+    # v2: per-entity history reads (ORDER BY ts DESC) and Main/Reports date ranges over notes
+    [
+        "CREATE INDEX IF NOT EXISTS idx_actions_entity_ts ON actions(entity_id, ts);",
+        "CREATE INDEX IF NOT EXISTS idx_notes_entity_ts ON notes(entity_id, ts);",
+        "CREATE INDEX IF NOT EXISTS idx_notes_ts ON notes(ts);",
+    ],
+    # v3: activity rollups, backfilled from existing history
+    ROLLUP_SCHEMA + [rebuild_rollups],
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
 def get_conn(db_path: str = DB_PATH) -> sqlite3.Connection:
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
     return conn
 
 
+def schema_version(conn: Optional[sqlite3.Connection] = None) -> int:
+    return (conn or _conn()).execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    # Apply pending migrations, one transaction each; BEGIN IMMEDIATE takes the write lock before the
+    # version is re-read, so concurrent processes never apply the same step twice
+    conn.execute("PRAGMA journal_mode=WAL;")
+    version = schema_version(conn)
+    while version < SCHEMA_VERSION:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = schema_version(conn)
+            if version < SCHEMA_VERSION:
+                for step in MIGRATIONS[version]:
+                    if callable(step):
+                        step(conn)
+                    else:
+                        conn.execute(step)
+                version += 1
+                conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return version
+
+
 def init_db(conn: Optional[sqlite3.Connection] = None) -> None:
-    own = False
     if conn is None:
-        conn = get_conn()
-        own = True
-    try:
-        cur = conn.cursor()
-        for sql in SCHEMA:
-            cur.execute(sql)
-        conn.commit()
-    finally:
-        if own:
+        _conn()
+        return
+    migrate(conn)
+
+
+# Connection manager: one persistent connection per (thread, database), migrations applied once per
+# database per process. A connection is closed when its thread's locals are released.
+_LOCAL = threading.local()
+_INIT_LOCK = threading.Lock()
+_READY = set()
+
+
+def _conn(db_path: Optional[str] = None) -> sqlite3.Connection:
+    path = db_path or DB_PATH
+    conns = getattr(_LOCAL, "conns", None)
+    if conns is None:
+        conns = _LOCAL.conns = {}
+    conn = conns.get(path)
+    if conn is None:
+        conn = conns[path] = get_conn(path)
+    if path not in _READY:
+        with _INIT_LOCK:
+            if path not in _READY:
+                init_db(conn)
+                _READY.add(path)
+    return conn
+
+
+def close_connections() -> None:
+    # Close this thread's pooled connections (they reopen on next use)
+    for conn in getattr(_LOCAL, "conns", {}).values():
+        try:
             conn.close()
+        except Exception:
+            pass
+    _LOCAL.conns = {}
+
+
+def _query(sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+    # Reads see every write submitted before them, even while the group-commit writer holds it
+    w = _WRITER
+    if w is not None and w.pending:
+        w.flush(WRITE_TIMEOUT_S)
+    return _conn().execute(sql, params).fetchall()
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
 
-def log_action(user_id: str, entity_id: str, action_type: str, payload: Optional[Dict[str, Any]] = None) -> int:
-    conn = get_conn()
-    init_db(conn)
-    cur = conn.cursor()
-    ts = _now_iso()
-    cur.execute(
+# Group commit (optional): a single background thread drains a bounded queue and commits whatever
+# arrived within GROUP_COMMIT_WINDOW_MS as one transaction. One writer and a FIFO queue keep writes in
+# submission order (so per entity too); each write runs in its own savepoint, so a failing write only
+# fails its own Future. Enabled with W3C_GROUP_COMMIT=1 or start_writer().
+GROUP_COMMIT = os.environ.get("W3C_GROUP_COMMIT", "").strip().lower() in ("1", "true", "yes")
+GROUP_COMMIT_WINDOW_MS = 5.0
+GROUP_COMMIT_MAX_BATCH = 256
+WRITE_QUEUE_SIZE = 1000
+# Longest a caller waits on the writer (a commit, or a flush before a read) before giving up
+WRITE_TIMEOUT_S = 30.0
+_STOP = object()
+
+
+class GroupCommitWriter:
+    def __init__(self, db_path: Optional[str] = None, window_ms: float = GROUP_COMMIT_WINDOW_MS,
+                 max_queue: int = WRITE_QUEUE_SIZE, max_batch: int = GROUP_COMMIT_MAX_BATCH):
+        self.db_path = db_path or DB_PATH
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.batches = 0
+        self.writes = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        # Orders submissions against close(): nothing can be queued behind the stop marker
+        self._submit_lock = threading.Lock()
+        self._closed = False
+        self._pending = 0
+        self._thread = threading.Thread(target=self._run, name="state-db-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, fn, args: Tuple = ()) -> Future:
+        # Blocks while the queue is full (back-pressure rather than unbounded memory); raises
+        # RuntimeError once the writer is closed or its thread has died
+        fut: Future = Future()
+        with self._submit_lock:
+            if self._closed or not self._thread.is_alive():
+                raise RuntimeError("state DB writer is stopped")
+            with self._lock:
+                self._pending += 1
+            self._queue.put((fn, args, fut))
+        return fut
+
+    def flush(self, timeout: Optional[float] = WRITE_TIMEOUT_S) -> None:
+        # Returns once everything submitted before the call is committed; on a closed writer, once
+        # it has drained. Raises TimeoutError rather than hanging.
+        try:
+            fut = self.submit(None)
+        except RuntimeError:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                raise TimeoutError("state DB writer did not drain")
+            return
+        fut.result(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        with self._submit_lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    def _commit(self, batch: List[Tuple[Any, Tuple, Future]]) -> None:
+        results = []
+        try:
+            conn = _conn(self.db_path)
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, args, fut in batch:
+                if fn is None:
+                    results.append((fut, None, None))
+                    continue
+                conn.execute("SAVEPOINT w")
+                try:
+                    res = fn(conn, *args)
+                    conn.execute("RELEASE w")
+                    results.append((fut, res, None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO w")
+                    conn.execute("RELEASE w")
+                    results.append((fut, None, e))
+            conn.commit()
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            results = [(fut, None, e) for _, _, fut in batch]
+        for (fn, args, _), (_, _, err) in zip(batch, results):
+            # Callers with wait=False never look at the Future, so a lost write must at least be logged
+            if err is not None and fn is not None:
+                logger.error("state DB write %s%r failed: %s", fn.__name__, args, err)
+        with self._lock:
+            self._pending -= len(batch)
+            self.batches += 1
+            self.writes += sum(1 for fn, _, _ in batch if fn is not None)
+        for fut, res, err in results:
+            if err is not None:
+                fut.set_exception(err)
+            else:
+                fut.set_result(res)
+
+
+_WRITER: Optional[GroupCommitWriter] = None
+_WRITER_LOCK = threading.Lock()
+
+
+def start_writer(window_ms: float = GROUP_COMMIT_WINDOW_MS) -> GroupCommitWriter:
+    global _WRITER
+    with _WRITER_LOCK:
+        if _WRITER is None:
+            _conn()  # migrate before the first queued write
+            _WRITER = GroupCommitWriter(window_ms=window_ms)
+            atexit.register(stop_writer)
+        return _WRITER
+
+
+def stop_writer() -> None:
+    # Commit everything still queued, then fall back to synchronous writes
+    global _WRITER
+    with _WRITER_LOCK:
+        w, _WRITER = _WRITER, None
+    if w is not None:
+        w.close()
+
+
+def writer_stats() -> Dict[str, int]:
+    w = _WRITER
+    if w is None:
+        return {}
+    return {"pending": w.pending, "batches": w.batches, "writes": w.writes}
+
+
+def _write(fn, args: Tuple, wait: bool = True) -> Any:
+    # Run fn(conn, *args) in a transaction: inline, or through the writer when it is running.
+    # wait=False returns a Future instead of blocking until the write is durable.
+    w = _WRITER
+    if w is not None:
+        try:
+            fut = w.submit(fn, args)
+        except RuntimeError:
+            # Stopped under us: let it drain, then write inline so ordering holds
+            w.flush()
+        else:
+            return fut.result(WRITE_TIMEOUT_S) if wait else fut
+    conn = _conn()
+    with conn:
+        res = fn(conn, *args)
+    if wait:
+        return res
+    fut = Future()
+    fut.set_result(res)
+    return fut
+
+
+_TOUCH_SQL = (
+    "INSERT INTO entity_state(entity_id, skipped, last_action_ts) VALUES(?,?,?)\n"
+    "         ON CONFLICT(entity_id) DO UPDATE SET last_action_ts=excluded.last_action_ts"
+)
+
+
+def _insert_action(conn: sqlite3.Connection, ts: str, user_id: str, entity_id: str, action_type: str, payload: str) -> int:
+    cur = conn.execute(
         "INSERT INTO actions(ts, user_id, entity_id, action_type, payload) VALUES(?,?,?,?,?)",
-        (ts, user_id, entity_id, action_type, json.dumps(payload or {}))
+        (ts, user_id, entity_id, action_type, payload)
     )
     # upsert entity_state
-    cur.execute(
-        "INSERT INTO entity_state(entity_id, skipped, last_action_ts) VALUES(?,?,?)\n         ON CONFLICT(entity_id) DO UPDATE SET last_action_ts=excluded.last_action_ts",
-        (entity_id, 0, ts)
-    )
-    conn.commit()
-    rid = cur.lastrowid
-    conn.close()
-    return rid
-
-
-def append_note(user_id: str, entity_id: str, note_text: str, follow_up_date: Optional[str] = None) -> int:
-    conn = get_conn()
-    init_db(conn)
-    cur = conn.cursor()
-    ts = _now_iso()
-    cur.execute(
+    conn.execute(_TOUCH_SQL, (entity_id, 0, ts))
+    return cur.lastrowid
+
+
+def _insert_note(conn: sqlite3.Connection, ts: str, user_id: str, entity_id: str, note_text: str, follow_up_date: Optional[str]) -> int:
+    cur = conn.execute(
         "INSERT INTO notes(ts, user_id, entity_id, note_text, follow_up_date) VALUES(?,?,?,?,?)",
         (ts, user_id, entity_id, note_text, follow_up_date)
     )
     # reflect last action
-    cur.execute(
-        "INSERT INTO entity_state(entity_id, skipped, last_action_ts) VALUES(?,?,?)\n         ON CONFLICT(entity_id) DO UPDATE SET last_action_ts=excluded.last_action_ts",
-        (entity_id, 0, ts)
-    )
-    conn.commit()
-    rid = cur.lastrowid
-    conn.close()
-    return rid
-
-
-def set_skip(entity_id: str, skipped: bool = True) -> None:
-    conn = get_conn()
-    init_db(conn)
-    cur = conn.cursor()
-    ts = _now_iso()
-    cur.execute(
+    conn.execute(_TOUCH_SQL, (entity_id, 0, ts))
+    return cur.lastrowid
+
+
+def _upsert_skip(conn: sqlite3.Connection, ts: str, entity_id: str, skipped: int) -> None:
+    conn.execute(
         "INSERT INTO entity_state(entity_id, skipped, last_action_ts) VALUES(?,?,?)\n         ON CONFLICT(entity_id) DO UPDATE SET skipped=excluded.skipped, last_action_ts=excluded.last_action_ts",
-        (entity_id, 1 if skipped else 0, ts)
+        (entity_id, skipped, ts)
+    )
+
+
+def _upsert_readiness(conn: sqlite3.Connection, ts: str, entity_id: str, answers: str, score: float, level: str) -> None:
+    conn.execute(
+        "INSERT INTO readiness(entity_id, ts, answers, score, level) VALUES(?,?,?,?,?)\n         ON CONFLICT(entity_id) DO UPDATE SET ts=excluded.ts, answers=excluded.answers, score=excluded.score, level=excluded.level",
+        (entity_id, ts, answers, score, level)
     )
-    conn.commit()
-    conn.close()
+    # reflect last action
+    conn.execute(_TOUCH_SQL, (entity_id, 0, ts))
+
+
+# Writers take the timestamp at submission, so queued writes keep the time the rep clicked
+
+def log_action(user_id: str, entity_id: str, action_type: str, payload: Optional[Dict[str, Any]] = None,
+               wait: bool = True) -> Union[int, Future]:
+    res = _write(_insert_action, (_now_iso(), user_id, entity_id, action_type, json.dumps(payload or {})), wait)
+    _invalidate_activity(entity_id, "actions")
+    return res
+
+
+def append_note(user_id: str, entity_id: str, note_text: str, follow_up_date: Optional[str] = None,
+                wait: bool = True) -> Union[int, Future]:
+    res = _write(_insert_note, (_now_iso(), user_id, entity_id, note_text, follow_up_date), wait)
+    _invalidate_activity(entity_id, "notes")
+    return res
+
+
+def set_skip(entity_id: str, skipped: bool = True, wait: bool = True) -> Optional[Future]:
+    fut = _write(_upsert_skip, (_now_iso(), entity_id, 1 if skipped else 0), wait)
+    return None if wait else fut
+
+
+# Entity activity cache -------------------------------------------------------
+# Notes, actions and readiness per entity, filled a window of entities at a time (one IN query per
+# table) and dropped per table when this process writes to that entity. The state DB has a single
+# writing process, so nothing else can make an entry stale.
+
+ACTIVITY_CACHE_SIZE = 1024
+_IN_CHUNK = 500
+_ACTIVITY_SQL = {
+    "notes": "SELECT * FROM notes WHERE entity_id IN ({}) ORDER BY entity_id, ts DESC, id DESC",
+    "actions": "SELECT * FROM actions WHERE entity_id IN ({}) ORDER BY entity_id, ts DESC, id DESC",
+    "readiness": "SELECT * FROM readiness WHERE entity_id IN ({})",
+}
+_ACTIVITY: "OrderedDict[str, Dict[str, List[sqlite3.Row]]]" = OrderedDict()
+_ACTIVITY_LOCK = threading.Lock()
+_ACTIVITY_EPOCH = 0
+_ACTIVITY_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _fetch_activity(entity_ids: List[str], kinds) -> Dict[str, Dict[str, List[sqlite3.Row]]]:
+    with _ACTIVITY_LOCK:
+        epoch = _ACTIVITY_EPOCH
+    fetched: Dict[str, Dict[str, List[sqlite3.Row]]] = {}
+    for kind in kinds:
+        got: Dict[str, List[sqlite3.Row]] = {e: [] for e in entity_ids}
+        for i in range(0, len(entity_ids), _IN_CHUNK):
+            chunk = entity_ids[i:i + _IN_CHUNK]
+            for r in _query(_ACTIVITY_SQL[kind].format(",".join("?" * len(chunk))), tuple(chunk)):
+                got[r["entity_id"]].append(r)
+        fetched[kind] = got
+    with _ACTIVITY_LOCK:
+        # A write during the queries may or may not be in the rows: return them, but don't cache them
+        if epoch == _ACTIVITY_EPOCH:
+            for kind, got in fetched.items():
+                for e, rows in got.items():
+                    _ACTIVITY.setdefault(e, {})[kind] = rows
+                    _ACTIVITY.move_to_end(e)
+            while len(_ACTIVITY) > ACTIVITY_CACHE_SIZE:
+                _ACTIVITY.popitem(last=False)
+                _ACTIVITY_STATS["evictions"] += 1
+    return fetched
+
+
+def prefetch_activity(entity_ids, kinds=tuple(_ACTIVITY_SQL)) -> None:
+    # Warm the cache for a window of entities (e.g. the visible lead list page); cached ones cost nothing
+    ids = list(dict.fromkeys(str(e) for e in entity_ids if e is not None))
+    with _ACTIVITY_LOCK:
+        kinds = [k for k in kinds if any(k not in _ACTIVITY.get(e, {}) for e in ids)]
+    if kinds:
+        _fetch_activity(ids, kinds)
+
+
+def _activity(entity_id: str, kind: str) -> List[sqlite3.Row]:
+    entity_id = str(entity_id)
+    with _ACTIVITY_LOCK:
+        entry = _ACTIVITY.get(entity_id)
+        if entry is not None and kind in entry:
+            _ACTIVITY.move_to_end(entity_id)
+            _ACTIVITY_STATS["hits"] += 1
+            return list(entry[kind])
+        _ACTIVITY_STATS["misses"] += 1
+    return list(_fetch_activity([entity_id], [kind])[kind][entity_id])
+
+
+def _invalidate_activity(entity_id: str, kind: str) -> None:
+    # Called after the write is committed or queued (reads flush the queue), never before
+    global _ACTIVITY_EPOCH
+    with _ACTIVITY_LOCK:
+        _ACTIVITY_EPOCH += 1
+        entry = _ACTIVITY.get(str(entity_id))
+        if entry is not None:
+            entry.pop(kind, None)
+
+
+def activity_cache_stats() -> Dict[str, int]:
+    with _ACTIVITY_LOCK:
+        return dict(_ACTIVITY_STATS, entities=len(_ACTIVITY))
 
 
 def get_notes(entity_id: str) -> List[sqlite3.Row]:
-    conn = get_conn()
-    init_db(conn)
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM notes WHERE entity_id=? ORDER BY ts DESC", (entity_id,))
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    return _activity(entity_id, "notes")
 
 
 def get_actions(entity_id: str) -> List[sqlite3.Row]:
-    conn = get_conn()
-    init_db(conn)
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM actions WHERE entity_id=? ORDER BY ts DESC", (entity_id,))
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    return _activity(entity_id, "actions")
 
 
 def get_actions_by_range(start_iso: str, end_iso: str) -> List[sqlite3.Row]:
-    conn = get_conn()
-    init_db(conn)
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM actions WHERE ts BETWEEN ? AND ? ORDER BY ts ASC", (start_iso, end_iso))
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    return _query("SELECT * FROM actions WHERE ts BETWEEN ? AND ? ORDER BY ts ASC", (start_iso, end_iso))
 
 
 def get_notes_by_range(start_iso: str, end_iso: str) -> List[sqlite3.Row]:
-    conn = get_conn()
-    init_db(conn)
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM notes WHERE ts BETWEEN ? AND ? ORDER BY ts ASC", (start_iso, end_iso))
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    return _query("SELECT * FROM notes WHERE ts BETWEEN ? AND ? ORDER BY ts ASC", (start_iso, end_iso))
 
-# Readiness overlay -----------------------------------------------------------
 
-def set_readiness(entity_id: str, answers: Dict[str, Any], score: float, level: str) -> None:
-    conn = get_conn()
-    init_db(conn)
-    cur = conn.cursor()
-    ts = _now_iso()
-    cur.execute(
-        "INSERT INTO readiness(entity_id, ts, answers, score, level) VALUES(?,?,?,?,?)\n         ON CONFLICT(entity_id) DO UPDATE SET ts=excluded.ts, answers=excluded.answers, score=excluded.score, level=excluded.level",
-        (entity_id, ts, json.dumps(answers or {}), float(score), str(level))
-    )
-    # reflect last action
-    cur.execute(
-        "INSERT INTO entity_state(entity_id, skipped, last_action_ts) VALUES(?,?,?)\n         ON CONFLICT(entity_id) DO UPDATE SET last_action_ts=excluded.last_action_ts",
-        (entity_id, 0, ts)
+TEXT_ACTIONS = ("pre_call_sms", "post_call_sms")
+
+
+def daily_metrics(day: str, user_id: Optional[str] = None) -> Dict[str, int]:
+    # Calls, texts and follow-ups set for that same day among notes written on day (YYYY-MM-DD, UTC),
+    # for one rep or everyone; reads the rollups only
+    user_sql = " AND user_id=?" if user_id else ""
+    params = (day, user_id) if user_id else (day,)
+    row = _query(
+        "SELECT COALESCE(SUM(CASE WHEN action_type='call' THEN n END), 0) AS calls,"
+        " COALESCE(SUM(CASE WHEN action_type IN (?, ?) THEN n END), 0) AS texts"
+        " FROM action_rollup WHERE day=?" + user_sql, TEXT_ACTIONS + params
+    )[0]
+    fu = _query("SELECT COALESCE(SUM(n), 0) AS n FROM note_rollup WHERE day=? AND follow_up_day=?" + user_sql,
+                (day, day) + params[1:])[0]
+    return {"calls": row["calls"], "texts": row["texts"], "followups": fu["n"]}
+
+
+def activity_by_rep(start_day: str, end_day: str) -> List[sqlite3.Row]:
+    # Per-rep action counts by type over an inclusive day range
+    return _query(
+        "SELECT user_id, action_type, SUM(n) AS n FROM action_rollup WHERE day BETWEEN ? AND ?"
+        " GROUP BY user_id, action_type HAVING SUM(n) > 0 ORDER BY user_id, action_type", (start_day, end_day)
     )
-    conn.commit()
-    conn.close()
+
+# Readiness overlay -----------------------------------------------------------
+
+# Entities saved per version: _READINESS_LOG[i] was written by the save that made the version
+# _READINESS_LOG_BASE + i + 1. The overlay fetches those ids instead of trusting ts order, which is
+# submission time and says nothing about commit order. Bounded; older gaps fall back to a full reload
+READINESS_LOG_SIZE = 10000
+_READINESS_LOCK = threading.Lock()
+_READINESS_LOG: List[str] = []
+_READINESS_LOG_BASE = 0
+
+
+def readiness_version() -> int:
+    return _READINESS_VERSION
+
+
+def readiness_changes(since_version: int) -> Tuple[int, Optional[List[str]]]:
+    # (current version, distinct entity ids saved after since_version), or None for the ids when
+    # they are no longer all in the log (or since_version predates this process)
+    with _READINESS_LOCK:
+        start = since_version - _READINESS_LOG_BASE
+        if since_version < 0 or start < 0:
+            return _READINESS_VERSION, None
+        return _READINESS_VERSION, list(dict.fromkeys(_READINESS_LOG[start:]))
+
+
+def set_readiness(entity_id: str, answers: Dict[str, Any], score: float, level: str, wait: bool = True) -> Optional[Future]:
+    global _READINESS_VERSION, _READINESS_LOG_BASE
+    fut = _write(_upsert_readiness, (_now_iso(), entity_id, json.dumps(answers or {}), float(score), str(level)), wait)
+    _invalidate_activity(entity_id, "readiness")
+    # Overlay reads flush the writer first, so bumping before a queued write commits is safe
+    with _READINESS_LOCK:
+        _READINESS_LOG.append(str(entity_id))
+        _READINESS_VERSION += 1
+        if len(_READINESS_LOG) > READINESS_LOG_SIZE:
+            drop = len(_READINESS_LOG) - READINESS_LOG_SIZE
+            del _READINESS_LOG[:drop]
+            _READINESS_LOG_BASE += drop
+    return None if wait else fut
 
 
 def get_readiness(entity_id: str) -> Optional[sqlite3.Row]:
-    conn = get_conn()
-    init_db(conn)
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM readiness WHERE entity_id=?", (entity_id,))
-    row = cur.fetchone()
-    conn.close()
-    return row
+    rows = _activity(entity_id, "readiness")
+    return rows[0] if rows else None
 
 
 def get_all_readiness() -> List[sqlite3.Row]:
-    conn = get_conn()
-    init_db(conn)
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM readiness")
-    rows = cur.fetchall()
-    conn.close()
+    return _query("SELECT * FROM readiness")
+
+
+def get_readiness_of(entity_ids: List[str]) -> List[sqlite3.Row]:
+    rows: List[sqlite3.Row] = []
+    for i in range(0, len(entity_ids), _IN_CHUNK):
+        chunk = entity_ids[i:i + _IN_CHUNK]
+        rows.extend(_query(_ACTIVITY_SQL["readiness"].format(",".join("?" * len(chunk))), tuple(chunk)))
     return rows
@@ -2,12 +2,28 @@ import re
 import json
 import os
 import glob
-from typing import List, Tuple, Optional
+import hashlib
+import itertools
+import logging
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple, Optional
+import numpy as np
 import pandas as pd
 import streamlit as st
+from pandas.tseries.api import guess_datetime_format
 from datetime import datetime
 from . import actions
 
+try:
+    import pyarrow as pa  # type: ignore
+except Exception:  # pragma: no cover
+    pa = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
 # Default to directory; we'll resolve the newest matching CSV at runtime
 CSV_DEFAULT_PATH = "data"
 
@@ -43,16 +59,7 @@ def _parse_ts_from_name(path: str) -> Optional[int]:
     return int(ymd + hms)
 
 
-def resolve_csv_path(csv_path: Optional[str] = None) -> str:
-    global LAST_CSV_PATH
-    # If given path exists as a file, use it
-    if csv_path and os.path.isfile(csv_path):
-        LAST_CSV_PATH = csv_path
-        return csv_path
-    # Determine base directory
-    base_dir = csv_path if (csv_path and os.path.isdir(csv_path)) else CSV_DEFAULT_PATH
-    if not os.path.isdir(base_dir):
-        base_dir = "data"
+def _scan_newest(base_dir: str) -> str:
     # Find newest matching file
     candidates = []
     for pat in ["FinalDataForDashboard_*.csv", "FinalDataForDashboard*.csv"]:
@@ -68,152 +75,875 @@ def resolve_csv_path(csv_path: Optional[str] = None) -> str:
         except Exception:
             mt = 0
         return (ts, mt)
-    best = sorted(candidates, key=sort_key, reverse=True)[0]
+    return sorted(candidates, key=sort_key, reverse=True)[0]
+
+
+class SourceResolver:
+    # Newest export per directory. The glob listing is reused until the directory's mtime changes, the
+    # chosen file disappears, or max_age passes (catches in-place edits that don't touch the directory)
+    def __init__(self, max_age: float = 30.0):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[int, float, str]] = {}
+
+    def newest(self, base_dir: str) -> str:
+        try:
+            dir_mtime = os.stat(base_dir).st_mtime_ns
+        except OSError:
+            dir_mtime = -1
+        now = time.monotonic()
+        hit = self._cache.get(base_dir)
+        if hit and hit[0] == dir_mtime and now - hit[1] < self.max_age and os.path.exists(hit[2]):
+            return hit[2]
+        best = _scan_newest(base_dir)
+        with self._lock:
+            self._cache[base_dir] = (dir_mtime, now, best)
+        return best
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+_SOURCES = SourceResolver()
+
+
+def resolve_csv_path(csv_path: Optional[str] = None) -> str:
+    global LAST_CSV_PATH
+    # If given path exists as a file, use it
+    if csv_path and os.path.isfile(csv_path):
+        LAST_CSV_PATH = csv_path
+        return csv_path
+    # Determine base directory
+    base_dir = csv_path if (csv_path and os.path.isdir(csv_path)) else CSV_DEFAULT_PATH
+    if not os.path.isdir(base_dir):
+        base_dir = "data"
+    best = _SOURCES.newest(base_dir)
     LAST_CSV_PATH = best
     return best
 
 
-@st.cache_data(show_spinner=False)
-def _read_csv_cached(path: str, mtime: float) -> pd.DataFrame:
+def _read_csv(path: str) -> pd.DataFrame:
     return pd.read_csv(path, dtype=str, keep_default_na=False)
 
 
-def load_csv(csv_path: Optional[str] = None) -> pd.DataFrame:
-    path = resolve_csv_path(csv_path)
-    mtime = os.path.getmtime(path) if os.path.exists(path) else 0.0
-    df = _read_csv_cached(path, mtime)
-    # Ensure EntityId exists; if not, synthesize from index
-    if "EntityId" not in df.columns:
-        df.insert(0, "EntityId", df.index.astype(str))
-    # Derived display name
-    def display_name(row):
-        # Prefer Leads first/last; fall back to Customers
-        fn = row.get("Leads_First_Name") or row.get("Customers_First_Name") or ""
-        ln = row.get("Leads_Last_Name") or row.get("Customers_Last_Name") or ""
-        nm = (fn + " " + ln).strip()
-        return nm or row.get("Customers_Customer_name") or row.get("Orders_Customer_name") or row.get("Leads_NormName") or row.get("Customers_NormName") or "Unknown"
-
-    # Phones
-    def collect_phones(row) -> Tuple[Optional[str], List[str]]:
-        candidates: List[str] = []
-        for col in ["Leads_Cell_E164", "Customers_Cell_E164", "Leads_Cell", "Customers_Cell", "Quotes_mobile_no", "Orders_Cell", "Leads_All_NormPhones", "Customers_All_NormPhones"]:
-            val = row.get(col)
-            if not val:
-                continue
-            for part in re.split(r"[;,\s]+", str(val)):
-                p = normalize_us_phone(part)
-                if p:
-                    candidates.append(p)
-        # Dedup preserving order
-        seen = set()
-        uniq = []
-        for p in candidates:
-            if p not in seen:
-                seen.add(p)
-                uniq.append(p)
-        primary = uniq[0] if uniq else None
-        return primary, uniq
-
-    # Emails
-    def collect_emails(row) -> Tuple[Optional[str], List[str]]:
-        ems: List[str] = []
-        for col in [
-            "Leads_Email_1","Leads_Email_2","Quotes_email","Quotes_email_2",
-            "Customers_Email_1","Customers_Email_2","Orders_Customer_Email","Invoices_Email"
-        ]:
-            v = row.get(col)
-            if not v:
-                continue
-            for part in re.split(r"[;,\s]+", str(v)):
-                part = part.strip().lower()
-                if part and "@" in part:
-                    ems.append(part)
-        seen = set(); uniq=[]
-        for e in ems:
-            if e not in seen:
-                seen.add(e); uniq.append(e)
-        primary = uniq[0] if uniq else None
-        return primary, uniq
-
-    # Attach derived columns
-    disp = []
-    prim_phone = []
-    all_phones = []
-    prim_email = []
-    all_emails = []
-    city = []
-    state = []
-    zipcode = []
-    last_call = []
-    last_text = []
-
-    for _, row in df.iterrows():
-        disp.append(display_name(row))
-        p0, ps = collect_phones(row)
-        prim_phone.append(p0)
-        all_phones.append(ps)
-        e0, es = collect_emails(row)
-        prim_email.append(e0)
-        all_emails.append(es)
-        city.append(row.get("Leads_City") or row.get("Customers_City") or "")
-        state.append(row.get("Leads_State") or row.get("Customers_State") or "")
-        zipcode.append(row.get("Leads_Zip_code") or row.get("Customers_Zip_code") or "")
-        last_call.append(row.get("Leads_LastCallDate") or row.get("Customers_LastCallDate") or "")
-        last_text.append(row.get("Leads_Text_LastTextDate") or row.get("Customers_Text_LastTextDate") or "")
-
-    df["display_name"] = disp
+# Columnar snapshot of the derived frame, written next to the CSV (Arrow IPC, memory-mapped on read)
+SIDECAR_SUFFIX = ".derived.arrow"
+SIDECAR_FORMAT = "3"
+SIDECAR_META_KEY = b"w3c_sidecar"
+LIST_COLUMNS = ["all_phones", "all_emails"]
+# Sidecars kept besides the current export's: the newest one seeds _previous_snapshot on a cold start
+SIDECAR_KEEP_PREVIOUS = 1
+
+
+def sidecar_path(csv_path: str) -> str:
+    return csv_path + SIDECAR_SUFFIX
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _with_sidecar_meta(schema, csv_path: str, mtime: float, sha256: Optional[str] = None,
+                       stats: Optional[Dict[str, Any]] = None):
+    meta = {
+        "format": SIDECAR_FORMAT,
+        "mtime": repr(mtime),
+        "size": os.path.getsize(csv_path),
+        "sha256": sha256 or _file_sha256(csv_path),
+        "stats": stats or {},
+    }
+    return schema.with_metadata({**(schema.metadata or {}), SIDECAR_META_KEY: json.dumps(meta)})
+
+
+def _write_sidecar_table(table, csv_path: str, mtime: float, sha256: Optional[str] = None,
+                         stats: Optional[Dict[str, Any]] = None) -> bool:
+    target = sidecar_path(csv_path)
+    tmp = target + ".tmp"
+    try:
+        table = table.replace_schema_metadata(_with_sidecar_meta(table.schema, csv_path, mtime, sha256, stats).metadata)
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, target)
+        return True
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+
+
+def _write_sidecar(df: pd.DataFrame, csv_path: str, mtime: float, sha256: Optional[str] = None,
+                   stats: Optional[Dict[str, Any]] = None) -> bool:
+    if pa is None:
+        return False
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except Exception:
+        return False
+    return _write_sidecar_table(table, csv_path, mtime, sha256, stats)
+
+
+def _prune_sidecars(csv_path: str) -> None:
+    # Historical exports pile up in the data directory; drop all but the newest other sidecars
+    own = sidecar_path(csv_path)
+    others = [p for p in glob.glob(os.path.join(os.path.dirname(csv_path) or ".", "*" + SIDECAR_SUFFIX)) if p != own]
+    try:
+        others.sort(key=os.path.getmtime, reverse=True)
+    except OSError:
+        return
+    for p in others[SIDECAR_KEEP_PREVIOUS:]:
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+
+
+def _open_sidecar(target: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+    if pa is None or not os.path.exists(target):
+        return None
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(target, "r"))
+        meta = json.loads((reader.schema.metadata or {}).get(SIDECAR_META_KEY, b"{}"))
+    except Exception:
+        return None
+    if meta.get("format") != SIDECAR_FORMAT:
+        return None
+    return reader, meta
+
+
+def _table_frame(table) -> pd.DataFrame:
+    df = table.to_pandas()
+    for col in LIST_COLUMNS:
+        if col in df.columns:
+            df[col] = [v or [] for v in table.column(col).to_pylist()]
+    return df
+
+
+def _sidecar_frame(reader, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    # The table is a zero-copy view of the memory map; only selected columns are materialized
+    table = reader.read_all()
+    if columns is not None:
+        wanted = set(columns)
+        table = table.select([c for c in table.column_names if c in wanted])
+    return _table_frame(table)
+
+
+def _read_sidecar(csv_path: str, mtime: float,
+                  columns: Optional[List[str]] = None) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+    # Returns None when missing, unreadable or stale (size/mtime/content hash mismatch)
+    opened = _open_sidecar(sidecar_path(csv_path))
+    if opened is None:
+        return None
+    reader, meta = opened
+    try:
+        if meta.get("size") != os.path.getsize(csv_path):
+            return None
+        touched = meta.get("mtime") != repr(mtime)
+        if touched:
+            sha = _file_sha256(csv_path)
+            if meta.get("sha256") != sha:
+                return None
+            # Same content under a new mtime: re-key so the next load takes the fast path
+            _write_sidecar_table(reader.read_all(), csv_path, mtime, sha, meta.get("stats"))
+        return _sidecar_frame(reader, columns), meta.get("stats") or {}
+    except Exception:
+        return None
+
+
+PHONE_SOURCE_COLUMNS = [
+    "Leads_Cell_E164", "Customers_Cell_E164", "Leads_Cell", "Customers_Cell",
+    "Quotes_mobile_no", "Orders_Cell", "Leads_All_NormPhones", "Customers_All_NormPhones",
+]
+EMAIL_SOURCE_COLUMNS = [
+    "Leads_Email_1", "Leads_Email_2", "Quotes_email", "Quotes_email_2",
+    "Customers_Email_1", "Customers_Email_2", "Orders_Customer_Email", "Invoices_Email",
+]
+SPLIT_RE = re.compile(r"[;,\s]+")
+
+
+def _cols(df: pd.DataFrame, names: List[str]) -> List[np.ndarray]:
+    return [df[c].to_numpy(dtype=object) for c in names if c in df.columns]
+
+
+def _coalesce(arrays: List[np.ndarray], n: int, default: str = "") -> np.ndarray:
+    # Column-wise equivalent of `a or b or ... or default` (Python truthiness)
+    out = np.full(n, default, dtype=object)
+    for arr in reversed(arrays):
+        out = np.where(arr.astype(bool), arr, out)
+    return out
+
+
+def parse_money(s: str) -> float:
+    try:
+        s = str(s)
+        # take first numeric if comma-separated
+        s = s.split(",")[0]
+        s = s.replace("$", "").replace(",", "").strip()
+        return float(s) if s else 0.0
+    except Exception:
+        return 0.0
+
+
+# Normalization engine: batch APIs (list in, list out) backed by bounded memo tables shared across
+# columns, rows and dataset builds, since the same raw phone/email strings repeat across sources
+NORMALIZE_MEMO_SIZE = 500_000
+
+
+class _BoundedMemo:
+    def __init__(self, fn, max_size: int = NORMALIZE_MEMO_SIZE):
+        self.fn = fn
+        self.max_size = max_size
+        self._data: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def batch(self, values: List[str]) -> List[Any]:
+        with self._lock:
+            memo = self._data
+            fn = self.fn
+            for v in values:
+                if v not in memo:
+                    memo[v] = fn(v)
+            out = [memo[v] for v in values]
+            # Oldest-first eviction keeps the table bounded
+            overflow = len(memo) - self.max_size
+            if overflow > 0:
+                for k in list(itertools.islice(memo, overflow)):
+                    del memo[k]
+        return out
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Memoized results are shared between callers, so the split tables store tuples
+
+def _phone_parts(raw: str) -> Tuple[str, ...]:
+    out = []
+    for part in SPLIT_RE.split(raw):
+        p = normalize_us_phone(part)
+        if p:
+            out.append(p)
+    return tuple(out)
+
+
+def _email_parts(raw: str) -> Tuple[str, ...]:
+    out = []
+    for part in SPLIT_RE.split(raw):
+        part = part.strip().lower()
+        if part and "@" in part:
+            out.append(part)
+    return tuple(out)
+
+
+_PHONE_MEMO = _BoundedMemo(normalize_us_phone)
+_PHONE_SPLIT_MEMO = _BoundedMemo(_phone_parts)
+_EMAIL_SPLIT_MEMO = _BoundedMemo(_email_parts)
+
+
+def normalize_phones(values: List[str]) -> List[Optional[str]]:
+    # Batch normalize_us_phone: one +1E.164 number (or None) per input value
+    return _PHONE_MEMO.batch(values)
+
+
+def split_phones(values: List[str]) -> List[List[str]]:
+    # Split multi-number fields on ; , and whitespace and keep the valid +1E.164 numbers, in order
+    return [list(p) for p in _PHONE_SPLIT_MEMO.batch(values)]
+
+
+def split_emails(values: List[str]) -> List[List[str]]:
+    # Split multi-address fields and keep lowercased parts containing "@", in order
+    return [list(p) for p in _EMAIL_SPLIT_MEMO.batch(values)]
+
+
+def _explode_column(arr: np.ndarray, parse_batch) -> Tuple[np.ndarray, np.ndarray]:
+    # Parse each distinct raw value once, then expand to (row, value) pairs with index arithmetic
+    rows = np.flatnonzero(arr.astype(bool))
+    if not len(rows):
+        return rows, np.empty(0, dtype=object)
+    codes, uniques = pd.factorize(arr[rows])
+    parsed = parse_batch([str(u) for u in uniques])
+    lens = np.fromiter((len(p) for p in parsed), dtype=np.int64, count=len(parsed))
+    flat = np.empty(int(lens.sum()), dtype=object)
+    flat[:] = [v for p in parsed for v in p]
+    offsets = np.r_[0, np.cumsum(lens)[:-1]]
+    row_lens = lens[codes]
+    total = int(row_lens.sum())
+    within = np.arange(total) - np.repeat(np.cumsum(row_lens) - row_lens, row_lens)
+    idx = np.repeat(offsets[codes], row_lens) + within
+    return np.repeat(rows, row_lens), flat[idx]
+
+
+def _collect(df: pd.DataFrame, cols: List[str], parse_batch) -> Tuple[np.ndarray, List[List[str]]]:
+    # Long form (row position, value) in column then part order, deduped per row
+    n = len(df)
+    primary = np.full(n, None, dtype=object)
+    lists: List[List[str]] = [[] for _ in range(n)]
+    pieces = [_explode_column(arr, parse_batch) for arr in _cols(df, cols)]
+    pieces = [p for p in pieces if len(p[0])]
+    if not pieces:
+        return primary, lists
+    rows = np.concatenate([p[0] for p in pieces])
+    vals = np.concatenate([p[1] for p in pieces])
+    order = np.argsort(rows, kind="stable")
+    flat = pd.DataFrame({"row": rows[order], "val": vals[order]}).drop_duplicates()
+    rows = flat["row"].to_numpy()
+    vals = flat["val"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    ends = np.r_[starts[1:], len(rows)]
+    primary[rows[starts]] = vals[starts]
+    for r, s, e in zip(rows[starts].tolist(), starts.tolist(), ends.tolist()):
+        lists[r] = vals[s:e].tolist()
+    return primary, lists
+
+
+DATE_SOURCE_COLUMNS = {
+    "last_call_dt": ["Leads_LastCallDate", "Customers_LastCallDate"],
+    "last_text_dt": ["Leads_Text_LastTextDate", "Customers_Text_LastTextDate"],
+}
+_NAT_STRINGS = ["", "NaT", "nat", "NAT", "nan", "NaN", "NAN"]
+
+
+def infer_date_formats(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+    # Same rule pd.to_datetime applies (guess from the first non-null value of the whole column), computed
+    # up front so that derived subsets of the file parse exactly like a full-file derivation
+    out: Dict[str, Optional[str]] = {}
+    for target, cols in DATE_SOURCE_COLUMNS.items():
+        vals = pd.Series(_coalesce(_cols(df, cols), len(df)), dtype=object)
+        present = np.flatnonzero(vals.notna() & ~vals.isin(_NAT_STRINGS))
+        first = vals.iloc[present[0]] if len(present) else None
+        if first is None:
+            # No value yet: leave undecided
+            continue
+        # "mixed" is pandas' own per-element fallback when the first value's format can't be guessed
+        out[target] = (guess_datetime_format(first) if isinstance(first, str) else None) or "mixed"
+    return out
+
+
+def _derive_dates(df: pd.DataFrame, date_formats: Optional[Dict[str, Optional[str]]], targets: List[str]) -> None:
+    n = len(df)
+    for target in targets:
+        vals = _coalesce(_cols(df, DATE_SOURCE_COLUMNS[target]), n)
+        fmt = (date_formats or {}).get(target)
+        if fmt:
+            df[target] = pd.to_datetime(vals, format=fmt, errors="coerce")
+        else:
+            df[target] = pd.to_datetime(vals, errors="coerce")
+
+
+def derive_columns(df: pd.DataFrame, date_formats: Optional[Dict[str, Optional[str]]] = None) -> pd.DataFrame:
+    n = len(df)
+    # Derived display name: prefer Leads first/last; fall back to Customers
+    fn = _coalesce(_cols(df, ["Leads_First_Name", "Customers_First_Name"]), n)
+    ln = _coalesce(_cols(df, ["Leads_Last_Name", "Customers_Last_Name"]), n)
+    nm = (pd.Series(fn, dtype=object) + " " + pd.Series(ln, dtype=object)).str.strip().to_numpy(dtype=object)
+    fallbacks = _cols(df, ["Customers_Customer_name", "Orders_Customer_name", "Leads_NormName", "Customers_NormName"])
+    df["display_name"] = _coalesce([nm] + fallbacks, n, "Unknown")
+
+    prim_phone, all_phones = _collect(df, PHONE_SOURCE_COLUMNS, _PHONE_SPLIT_MEMO.batch)
+    prim_email, all_emails = _collect(df, EMAIL_SOURCE_COLUMNS, _EMAIL_SPLIT_MEMO.batch)
     df["primary_phone"] = prim_phone
     df["all_phones"] = all_phones
     df["primary_email"] = prim_email
     df["all_emails"] = all_emails
-    df["city"] = city
-    df["state"] = state
-    df["zip"] = zipcode
+    df["city"] = _coalesce(_cols(df, ["Leads_City", "Customers_City"]), n)
+    df["state"] = _coalesce(_cols(df, ["Leads_State", "Customers_State"]), n)
+    df["zip"] = _coalesce(_cols(df, ["Leads_Zip_code", "Customers_Zip_code"]), n)
 
     # Numeric quote proxy if present
-    def parse_money(s: str) -> float:
-        try:
-            s = str(s)
-            # take first numeric if comma-separated
-            s = s.split(",")[0]
-            s = s.replace("$", "").replace(",", "").strip()
-            return float(s) if s else 0.0
-        except Exception:
-            return 0.0
-
-    if "Last_quote_grandtotal" in df.columns:
-        df["value_proxy_num"] = df["Last_quote_grandtotal"].apply(parse_money)
-    elif "Quotes_grand_total" in df.columns:
-        df["value_proxy_num"] = df["Quotes_grand_total"].apply(parse_money)
+    money_col = next((c for c in ["Last_quote_grandtotal", "Quotes_grand_total"] if c in df.columns), None)
+    if money_col:
+        raw = df[money_col]
+        lut = {u: parse_money(u) for u in pd.unique(raw.to_numpy())}
+        df["value_proxy_num"] = raw.map(lut).astype(float)
     else:
         df["value_proxy_num"] = 0.0
 
     # Parsed dates for recency sorts
-    df["last_call_dt"] = pd.to_datetime(last_call, errors="coerce")
-    df["last_text_dt"] = pd.to_datetime(last_text, errors="coerce")
+    _derive_dates(df, date_formats, list(DATE_SOURCE_COLUMNS))
 
     # Owner convenience
     df["owner"] = df.get("Leads_Owner", pd.Series([""]*len(df)))
+    return df
 
-    # Merge readiness overlay (latest answers stored in SQLite)
-    try:
-        rows = actions.get_all_readiness()
-        if rows:
-            # Build maps
-            r_level = {r["entity_id"]: r["level"] for r in rows}
-            r_score = {r["entity_id"]: r["score"] for r in rows}
-            if "Initial_Readiness_level" not in df.columns:
-                df["Initial_Readiness_level"] = ""
-            df["Initial_Readiness_level"] = df.apply(
-                lambda r: r_level.get(r["EntityId"], r.get("Initial_Readiness_level", "")), axis=1
-            )
-            df["Readiness_Score"] = df.apply(lambda r: r_score.get(r["EntityId"], None), axis=1)
-    except Exception:
-        pass
 
+# Compact dtype schema: low-cardinality text as categoricals, "true"/"false" flags as nullable booleans
+CATEGORY_COLUMNS = ["Leads_Owner", "owner", "Leads_Stage", "Customers_Stage", "state", "Initial_Readiness_level"]
+BOOL_COLUMNS = [
+    "Leads_NotCalledIn30Days", "Leads_LastCallLessthan30Days",
+    "Leads_Text_TextedWithIn30days", "Customers_Text_TextedWithIn30days",
+    "Leads_with_extended_calls", "Customers_with_extended_calls",
+    "Initial_Readiness_level_Check", "Site_Prep_Status_Check",
+    "Permit_Status_Check", "Ready_to_install_in_Check",
+    "Leads_State_Check", "Number_of_quotes_Check", "Same_dimension_quotes_Check",
+    "Last_quote_dimensions_Check", "ProximityCheck", "EZ_Pay_Qualified",
+    "Leads_Called", "Customers_Called", "Leads_Spoken", "Customers_Spoken",
+    "Leads_RepeatedSpoken", "Customers_RepeatedSpoken",
+]
+_BOOL_TEXT = {"true": True, "false": False, "": None}
+
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=False, deep=True).sum())
+
+
+def _bool_or_text(s: pd.Series) -> pd.Series:
+    # Nullable booleans when every distinct value is a flag; otherwise plain strings so nothing is lost
+    codes, uniques = pd.factorize(s)
+    lowered = [str(u).lower() for u in uniques]
+    if not all(u in _BOOL_TEXT for u in lowered):
+        return s.astype(object) if isinstance(s.dtype, pd.CategoricalDtype) else s
+    lut = pd.array([_BOOL_TEXT[u] for u in lowered] + [None], dtype="boolean")
+    return pd.Series(lut.take(codes), index=s.index)
+
+
+def compact_dtypes(df: pd.DataFrame, bools: bool = True) -> pd.DataFrame:
+    # bools=False holds flag columns as categoricals (exact text kept) for a caller that decides the
+    # bool/text question over all chunks at once, see _concat_compact
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = df[col].astype("category")
+    for col in BOOL_COLUMNS:
+        if col in df.columns and df[col].dtype == object:
+            df[col] = _bool_or_text(df[col]) if bools else df[col].astype("category")
     return df
 
 
+# Incremental ingest: rows whose source fingerprint matches the previous snapshot reuse its derived columns
+FINGERPRINT_COL = "_row_hash"
+DERIVED_COLUMNS = [
+    "display_name", "primary_phone", "all_phones", "primary_email", "all_emails",
+    "city", "state", "zip", "value_proxy_num", "last_call_dt", "last_text_dt", "owner",
+]
+
+# Last dataset built in this process (weak, so an evicted dataset is not kept alive)
+_LAST_BUILT: Optional[weakref.ref] = None
+
+
+def _fingerprint(raw: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(raw, index=False).to_numpy()
+
+
+def _columns_key(raw: pd.DataFrame) -> str:
+    return hashlib.sha1("\x1f".join(map(str, raw.columns)).encode("utf-8")).hexdigest()
+
+
+def _previous_snapshot(path: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+    last = _LAST_BUILT() if _LAST_BUILT is not None else None
+    if last is not None and FINGERPRINT_COL in last.df.columns:
+        return last.df, last.stats
+    # Cold start: any earlier export's snapshot will do; fingerprints decide which rows are reusable
+    own = sidecar_path(path)
+    others = [p for p in glob.glob(os.path.join(os.path.dirname(path) or ".", "*" + SIDECAR_SUFFIX)) if p != own]
+    for target in sorted(others, key=os.path.getmtime, reverse=True):
+        opened = _open_sidecar(target)
+        if opened is not None:
+            try:
+                return _sidecar_frame(opened[0], ["EntityId", FINGERPRINT_COL] + DERIVED_COLUMNS), opened[1].get("stats") or {}
+            except Exception:
+                continue
+    return None
+
+
+def _derive_incremental(raw: pd.DataFrame, fp: np.ndarray, prev: pd.DataFrame, prev_ids: pd.Index,
+                        date_formats: Dict[str, Optional[str]],
+                        prev_formats: Optional[Dict[str, Optional[str]]] = None) -> Optional[Dict[str, int]]:
+    new_ids = pd.Index(raw["EntityId"])
+    if not (prev_ids.is_unique and new_ids.is_unique):
+        return None
+    prev_pos = prev_ids.get_indexer(new_ids)
+    known = prev_pos >= 0
+    same = known.copy()
+    same[known] = prev[FINGERPRINT_COL].to_numpy()[prev_pos[known]] == fp[known]
+    fresh = np.flatnonzero(~same)
+    part = derive_columns(raw.iloc[fresh].reset_index(drop=True), date_formats)
+    old = prev[DERIVED_COLUMNS].iloc[prev_pos[same]].set_axis(np.flatnonzero(same))
+    merged = pd.concat([old, part[DERIVED_COLUMNS].set_axis(fresh)]).sort_index()
+    for col in DERIVED_COLUMNS:
+        raw[col] = merged[col].to_numpy()
+    # Reused dates were parsed with the previous export's inferred format; reparse any whose format moved
+    stale = [t for t in DATE_SOURCE_COLUMNS if prev_formats is None or prev_formats.get(t) != date_formats.get(t)]
+    if stale and same.any():
+        _derive_dates(raw, date_formats, stale)
+    return {
+        "added": int((~known).sum()),
+        "changed": int((known & ~same).sum()),
+        "removed": int(len(prev_ids) - known.sum()),
+        "reused": int(same.sum()),
+        "known": int(known.sum()),
+    }
+
+
+def _ingest_csv(path: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    df = _read_csv(path)
+    # Ensure EntityId exists; if not, synthesize from index
+    if "EntityId" not in df.columns:
+        df.insert(0, "EntityId", df.index.astype(str))
+    fp = _fingerprint(df)
+    stats: Dict[str, Any] = {"columns_key": _columns_key(df)}
+    stats["date_formats"] = infer_date_formats(df)
+    counts = None
+    prev = _previous_snapshot(path)
+    if prev is not None and prev[1].get("columns_key") == stats["columns_key"]:
+        counts = _derive_incremental(df, fp, prev[0], pd.Index(prev[0]["EntityId"]), stats["date_formats"],
+                                     prev[1].get("date_formats"))
+    if counts is None:
+        df = derive_columns(df)
+        counts = {"added": len(df), "changed": 0, "removed": 0, "reused": 0}
+    counts.pop("known", None)
+    df[FINGERPRINT_COL] = fp
+    stats["ingest"] = counts
+    logger.info("ingest %s: added=%d changed=%d removed=%d reused=%d", os.path.basename(path),
+                counts["added"], counts["changed"], counts["removed"], counts["reused"])
+    return df, stats
+
+
+# Streaming ingest for exports too large to parse in one go: the CSV is read in bounded chunks and each
+# chunk is fingerprinted, derived, written to the sidecar, compacted and projected on its own
+STREAM_THRESHOLD_MB = 512
+STREAM_MEMORY_BUDGET_MB = 256
+# Rough working set per CSV byte while a chunk is parsed and derived (raw strings + derived copies)
+_STREAM_BYTES_FACTOR = 10
+
+
+def _stream_chunk_rows(path: str, budget_mb: float) -> int:
+    with open(path, "rb") as f:
+        sample = f.read(1 << 20)
+    lines = max(sample.count(b"\n") - 1, 1)
+    row_bytes = max(len(sample) / lines, 1.0)
+    return max(int(budget_mb * 2**20 / (row_bytes * _STREAM_BYTES_FACTOR)), 1000)
+
+
+def _sidecar_schema(df: pd.DataFrame):
+    # Fixed schema for every chunk: raw columns stay strings, list columns are list<string>
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for i, fld in enumerate(schema):
+        if fld.name in LIST_COLUMNS:
+            schema = schema.set(i, pa.field(fld.name, pa.list_(pa.string())))
+        elif pa.types.is_null(fld.type):
+            schema = schema.set(i, pa.field(fld.name, pa.string()))
+    return schema
+
+
+def _concat_compact(parts: List[pd.DataFrame]) -> pd.DataFrame:
+    # Chunks come from compact_dtypes(bools=False): flag columns turn boolean only if they are flags in
+    # every chunk, matching a whole-file build
+    out = {}
+    for col in parts[0].columns:
+        series = [p[col] for p in parts]
+        if len(series) == 1:
+            out[col] = series[0]
+        elif all(isinstance(s.dtype, pd.CategoricalDtype) for s in series):
+            out[col] = pd.Series(pd.api.types.union_categoricals(series, sort_categories=True))
+        else:
+            out[col] = pd.concat(series, ignore_index=True)
+        if col in BOOL_COLUMNS and isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = _bool_or_text(out[col])
+    return pd.DataFrame(out)
+
+
+def _ingest_streaming(path: str, mtime: float,
+                      budget_mb: Optional[float] = None) -> Tuple[pd.DataFrame, Dict[str, Any], Optional[str]]:
+    chunk_rows = _stream_chunk_rows(path, budget_mb or STREAM_MEMORY_BUDGET_MB)
+    prev = _previous_snapshot(path)
+    prev_ids = pd.Index(prev[0]["EntityId"]) if prev is not None else None
+    date_formats: Dict[str, Optional[str]] = {}
+    counts = {"added": 0, "changed": 0, "removed": 0, "reused": 0}
+    known = before = 0
+    parts: List[pd.DataFrame] = []
+    stats: Dict[str, Any] = {}
+    target = sidecar_path(path)
+    tmp = target + ".tmp"
+    sink = writer = schema = None
+    sidecar_ok = pa is not None
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_rows):
+        if "EntityId" not in chunk.columns:
+            chunk.insert(0, "EntityId", chunk.index.astype(str))
+        chunk = chunk.reset_index(drop=True)
+        if not stats:
+            stats = {"columns_key": _columns_key(chunk), "stream": {"chunk_rows": chunk_rows},
+                     "date_formats": date_formats}
+        fp = _fingerprint(chunk)
+        for k, v in infer_date_formats(chunk).items():
+            date_formats.setdefault(k, v)
+        part = None
+        if prev is not None and prev[1].get("columns_key") == stats["columns_key"]:
+            part = _derive_incremental(chunk, fp, prev[0], prev_ids, date_formats, prev[1].get("date_formats"))
+        if part is None:
+            chunk = derive_columns(chunk, date_formats)
+            counts["added"] += len(chunk)
+        else:
+            for k in ("added", "changed", "reused"):
+                counts[k] += part[k]
+            known += part["known"]
+        chunk[FINGERPRINT_COL] = fp
+        if sidecar_ok:
+            try:
+                if writer is None:
+                    schema = _with_sidecar_meta(_sidecar_schema(chunk), path, mtime, stats=stats)
+                    sink = pa.OSFile(tmp, "wb")
+                    writer = pa.ipc.new_file(sink, schema)
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            except Exception:
+                sidecar_ok = False
+        before += _frame_bytes(chunk)
+        parts.append(_project(compact_dtypes(chunk, bools=False)))
+        del chunk
+    detail_source = None
+    if writer is not None:
+        try:
+            writer.close()
+            sink.close()
+            if sidecar_ok:
+                os.replace(tmp, target)
+                detail_source = target
+        except Exception:
+            pass
+    if detail_source is None:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        logger.warning("streaming ingest %s: no sidecar written, detail columns unavailable", os.path.basename(path))
+    if prev_ids is not None and known:
+        counts["removed"] = int(len(prev_ids) - known)
+    stats["ingest"] = counts
+    stats.setdefault("stream", {})["chunks"] = len(parts)
+    logger.info("streaming ingest %s: %d chunks of %d rows, added=%d changed=%d removed=%d reused=%d",
+                os.path.basename(path), len(parts), chunk_rows,
+                counts["added"], counts["changed"], counts["removed"], counts["reused"])
+    df = _concat_compact(parts) if parts else _project(compact_dtypes(derive_columns(_read_csv(path))))
+    # Full-width derived chunks before compaction, the same measure as a whole-file build
+    stats["memory_before"] = before
+    stats["memory_after"] = stats["memory_resident"] = _frame_bytes(df)
+    return df, stats, detail_source
+
+
+READINESS_LEVEL_COL = "Initial_Readiness_level"
+READINESS_SCORE_COL = "Readiness_Score"
+
+# Column projection: the resident frame holds only what lists, filters, search and sorting touch;
+# wide Leads_/Customers_/Quotes_/Orders_/Invoices_ detail is read per lead from the memory-mapped sidecar
+HOT_COLUMNS = (
+    ["EntityId", FINGERPRINT_COL, READINESS_SCORE_COL, "Leads_NormName", "Customers_NormName"]
+    + DERIVED_COLUMNS + CATEGORY_COLUMNS + BOOL_COLUMNS
+)
+
+
+def _project(df: pd.DataFrame) -> pd.DataFrame:
+    hot = set(HOT_COLUMNS)
+    return df[[c for c in df.columns if c in hot]].copy()
+
+def _patch_readiness(df: pd.DataFrame, positions: np.ndarray, levels: List[str], scores: np.ndarray) -> pd.DataFrame:
+    # Returns a shallow copy with overlay level/score written at the given row positions
+    out = df.copy(deep=False)
+    level = df[READINESS_LEVEL_COL] if READINESS_LEVEL_COL in df.columns else pd.Series("", index=df.index)
+    if not isinstance(level.dtype, pd.CategoricalDtype):
+        level = level.astype("category")
+    missing = sorted(set(levels) - set(level.cat.categories))
+    if missing:
+        level = level.cat.set_categories(sorted(list(level.cat.categories) + missing))
+    codes = level.cat.codes.to_numpy().copy()
+    codes[positions] = level.cat.categories.get_indexer(levels)
+    out[READINESS_LEVEL_COL] = pd.Categorical.from_codes(codes, categories=level.cat.categories)
+    score = df[READINESS_SCORE_COL].to_numpy(dtype=float).copy() if READINESS_SCORE_COL in df.columns else np.full(len(df), np.nan)
+    score[positions] = scores
+    out[READINESS_SCORE_COL] = score
+    return out
+
+
+# Distinct per LeadDataset built in this process; part of the version, since a rebuild of the same
+# export restarts overlay_seq
+_BUILD_IDS = itertools.count(1)
+
+
+@dataclass
+class LeadDataset:
+    # Fully derived lead frame shared by every session; treat df as read-only
+    df: pd.DataFrame
+    path: str
+    mtime: float
+    overlay_version: int = -1
+    overlay_seq: int = 0
+    stats: Dict[str, Any] = field(default_factory=dict)
+    built_at: float = field(default_factory=time.time)
+    build_id: int = field(default_factory=lambda: next(_BUILD_IDS))
+    detail_source: Optional[str] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _entity_index: Optional[pd.Index] = field(default=None, repr=False)
+    _detail_table: Any = field(default=None, repr=False)
+
+    @property
+    def version(self) -> str:
+        # Keys the filter, facet and priority caches: exact mtime, build and overlay revision
+        return f"{os.path.basename(self.path)}@{self.mtime!r}:b{self.build_id}:r{self.overlay_seq}"
+
+    @property
+    def entity_index(self) -> pd.Index:
+        if self._entity_index is None:
+            self._entity_index = pd.Index(self.df["EntityId"])
+        return self._entity_index
+
+    def positions_of(self, entity_ids: List[str]) -> np.ndarray:
+        idx = self.entity_index
+        if idx.is_unique:
+            pos = idx.get_indexer(entity_ids)
+            return pos[pos >= 0]
+        return np.flatnonzero(idx.isin(entity_ids))
+
+    def detail(self, entity_id: str) -> Dict[str, Any]:
+        # Cold (non-resident) columns for one lead, read by row offset from the memory-mapped sidecar
+        if not self.detail_source:
+            return {}
+        pos = self.positions_of([entity_id])
+        if not len(pos):
+            return {}
+        try:
+            if self._detail_table is None:
+                opened = _open_sidecar(self.detail_source)
+                if opened is None:
+                    return {}
+                self._detail_table = opened[0].read_all()
+            table = self._detail_table
+            cold = [c for c in table.column_names if c not in self.df.columns]
+            return table.select(cold).slice(int(pos[0]), 1).to_pylist()[0]
+        except Exception:
+            return {}
+
+    def detail_row(self, row: pd.Series) -> pd.Series:
+        extra = self.detail(row["EntityId"])
+        if not extra:
+            return row
+        return pd.concat([row, pd.Series(extra, dtype=object)])
+
+    def refresh_overlay(self) -> int:
+        # Patch the readiness rows of entities saved since the last refresh (by id, whatever order the
+        # saves committed in); the first refresh loads them all. Returns the number of overlay rows applied
+        with self._lock:
+            target, ids = actions.readiness_changes(self.overlay_version)
+            if target == self.overlay_version:
+                return 0
+            try:
+                rows = actions.get_all_readiness() if ids is None else actions.get_readiness_of(ids)
+            except Exception:
+                return 0
+            self.overlay_version = target
+            if not rows:
+                return 0
+            ov = pd.DataFrame(
+                {"level": [r["level"] for r in rows], "score": [r["score"] for r in rows]},
+                index=[r["entity_id"] for r in rows],
+            )
+            positions = self.positions_of(ov.index.tolist())
+            if len(positions):
+                vals = ov.reindex(self.entity_index[positions])
+                self.df = _patch_readiness(self.df, positions, vals["level"].tolist(), vals["score"].to_numpy(dtype=float))
+                self.overlay_seq += 1
+            return len(rows)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _build_dataset(path: str, mtime: float) -> LeadDataset:
+    detail_source = sidecar_path(path)
+    cached = _read_sidecar(path, mtime, HOT_COLUMNS)
+    if cached is not None:
+        df, stats = cached
+        # Streamed snapshots are stored uncompacted (one schema for every chunk)
+        df = compact_dtypes(df)
+    elif os.path.getsize(path) > STREAM_THRESHOLD_MB * 2**20:
+        df, stats, detail_source = _ingest_streaming(path, mtime)
+    else:
+        df, stats = _ingest_csv(path)
+        stats["memory_before"] = _frame_bytes(df)
+        df = compact_dtypes(df)
+        stats["memory_after"] = _frame_bytes(df)
+        hot = _project(df)
+        # Set before the sidecar stores the stats, so a restart that loads it reports it too
+        stats["memory_resident"] = _frame_bytes(hot)
+        if _write_sidecar(df, path, mtime, stats=stats):
+            df = hot
+        else:
+            # No sidecar to read detail columns from: keep the full width resident
+            detail_source = None
+            stats["memory_resident"] = stats["memory_after"]
+    if READINESS_SCORE_COL not in df.columns:
+        df[READINESS_SCORE_COL] = np.nan
+    ds = LeadDataset(df=df, path=path, mtime=mtime, stats=stats, detail_source=detail_source)
+    if os.path.exists(sidecar_path(path)):
+        _prune_sidecars(path)
+    # Initial merge of the readiness overlay (latest answers stored in SQLite)
+    ds.refresh_overlay()
+    global _LAST_BUILT
+    _LAST_BUILT = weakref.ref(ds)
+    return ds
+
+
+def load_dataset(csv_path: Optional[str] = None) -> LeadDataset:
+    path = resolve_csv_path(csv_path)
+    mtime = os.path.getmtime(path) if os.path.exists(path) else 0.0
+    ds = _build_dataset(path, mtime)
+    if ds.overlay_version != actions.readiness_version():
+        ds.refresh_overlay()
+    return ds
+
+
+# Optional background poller: notices a new export and builds its dataset before the next rerun asks for it.
+# Off unless W3C_SOURCE_POLL=1.
+SOURCE_POLL = os.environ.get("W3C_SOURCE_POLL", "").strip().lower() in ("1", "true", "yes")
+SOURCE_POLL_SECONDS = 60.0
+_POLLER_NAME = "csv-source-poller"
+_POLLER: Optional[threading.Thread] = None
+_POLLER_LOCK = threading.Lock()
+
+
+class _PollerContextFilter(logging.Filter):
+    # The poller fills the st.cache_resource cache outside any script run by design; Streamlit would log
+    # "missing ScriptRunContext" for every pre-warm
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.threadName != _POLLER_NAME
+
+
+def start_source_poller(interval: float = SOURCE_POLL_SECONDS, csv_path: Optional[str] = None) -> None:
+    global _POLLER
+    if interval <= 0:
+        return
+    with _POLLER_LOCK:
+        if _POLLER is not None and _POLLER.is_alive():
+            return
+
+        def run():
+            try:
+                path = resolve_csv_path(csv_path)
+                warmed = (path, os.path.getmtime(path))
+            except Exception:
+                warmed = None
+            while True:
+                time.sleep(interval)
+                try:
+                    path = resolve_csv_path(csv_path)
+                    key = (path, os.path.getmtime(path))
+                    if key != warmed:
+                        logger.info("source poller: pre-warming %s", os.path.basename(path))
+                        _build_dataset(*key)
+                        warmed = key
+                except Exception:
+                    logger.exception("source poller: refresh failed")
+
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(_PollerContextFilter())
+        _POLLER = threading.Thread(target=run, name=_POLLER_NAME, daemon=True)
+        _POLLER.start()
+
+
+def load_csv(csv_path: Optional[str] = None) -> pd.DataFrame:
+    return load_dataset(csv_path).df
+
+
 def get_current_csv_path() -> str:
     return LAST_CSV_PATH or resolve_csv_path(CSV_DEFAULT_PATH)
 
@@ -1,15 +1,250 @@
-from typing import Dict, Any, Tuple, List
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Tuple, List, Optional
+import numpy as np
 import pandas as pd
 import streamlit as st
+from .priority import PRIORITY_SORT, PriorityScores
+from .search import FuzzyIndex, SearchIndex, substring_rows
+
+logger = logging.getLogger(__name__)
+
+def _true_mask(s: pd.Series) -> pd.Series:
+    # Compact frames store flags as nullable booleans; fall back to text compare otherwise
+    if isinstance(s.dtype, pd.BooleanDtype):
+        return s.fillna(False).astype(bool)
+    return s.astype(str).str.lower() == "true"
+
+
+# Stages hidden from the workspace unless a later export changes them
+EXCLUDED_STAGES = ["Cold Lead", "Payment confirmed", "Partial payment confirmed", "Direct purchase"]
+
+READINESS_COL = "Initial_Readiness_level"
+
+CHECK_COLUMNS = [
+    # Prior toggles
+    "Leads_NotCalledIn30Days", "Leads_LastCallLessthan30Days",
+    "Leads_Text_TextedWithIn30days", "Customers_Text_TextedWithIn30days",
+    "Leads_with_extended_calls", "Customers_with_extended_calls",
+    # New checks
+    "Initial_Readiness_level_Check", "Site_Prep_Status_Check",
+    "Permit_Status_Check", "Ready_to_install_in_Check",
+    "Leads_State_Check", "Number_of_quotes_Check", "Same_dimension_quotes_Check",
+    "Last_quote_dimensions_Check", "ProximityCheck", "EZ_Pay_Qualified",
+]
+
+INTERACTION_COLUMNS = {
+    "Called": ["Leads_Called", "Customers_Called"],
+    "Spoken": ["Leads_Spoken", "Customers_Spoken"],
+    "RepeatedSpoken": ["Leads_RepeatedSpoken", "Customers_RepeatedSpoken"],
+}
+
+VALUE_COLUMNS = ["owner", "Leads_Stage", "Customers_Stage", "state", READINESS_COL]
+
+# Sort choices offered by filter_bar; each gets a precomputed permutation per direction
+SORT_COLUMNS = ["display_name", "state", "Leads_Stage", READINESS_COL, "last_call_dt", "last_text_dt", "value_proxy_num"]
+
+
+def _pack(mask) -> np.ndarray:
+    return np.packbits(np.asarray(mask, dtype=bool))
+
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def _bit_test(bits: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    # Read a packed bitset (np.packbits order) at the given row positions
+    return ((bits[rows >> 3] >> (7 - (rows & 7))) & 1).astype(bool)
+
+
+def _popcount(bits: np.ndarray) -> int:
+    return int(_POPCOUNT[bits].sum())
+
+
+def _sort_permutation(s: pd.Series, ascending: bool) -> np.ndarray:
+    # Row positions in sort order (stable, missing values last)
+    keys = s.reset_index(drop=True)
+    return keys.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+
+
+def _value_index(s: pd.Series) -> Tuple[np.ndarray, List[Any], Dict[Any, np.ndarray]]:
+    # Group codes, distinct values and one packed bitset per value (NA is code -1 and matches
+    # nothing, as with isin)
+    codes, uniques = pd.factorize(s)
+    uniques = list(uniques)
+    return codes, uniques, {u: _pack(codes == i) for i, u in enumerate(uniques)}
+
+
+class FilterIndex:
+    # Packed bitsets per (column, value) and per check column for one dataset version, so a filter
+    # request is a handful of bitwise ANDs/ORs and one take
+    def __init__(self, df: pd.DataFrame, version: str = ""):
+        self.n = len(df)
+        self.version = version
+        self.values: Dict[str, Dict[Any, np.ndarray]] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        self.uniques: Dict[str, List[Any]] = {}
+        self.counts: Dict[str, Dict[Any, int]] = {}
+        self.flags: Dict[str, np.ndarray] = {}
+        self.flag_counts: Dict[str, int] = {}
+        for col in VALUE_COLUMNS:
+            if col in df.columns:
+                self._set_values(col, df[col])
+        flag_cols = CHECK_COLUMNS + [c for cols in INTERACTION_COLUMNS.values() for c in cols]
+        for col in flag_cols:
+            if col in df.columns:
+                self.flags[col] = _pack(_true_mask(df[col]).to_numpy())
+                self.flag_counts[col] = _popcount(self.flags[col])
+        self.perms: Dict[Tuple[str, bool], np.ndarray] = {}
+        self.ranks: Dict[Tuple[str, bool], np.ndarray] = {}
+        for col in SORT_COLUMNS:
+            if col in df.columns:
+                for asc in (True, False):
+                    self._set_order(col, asc, df[col])
+        # Owner shards: sorted row positions per owner, so rep-scoped requests start from their own
+        # book plus the shared pool instead of the whole frame
+        self.shards: Dict[Any, np.ndarray] = {}
+        if "owner" in self.codes:
+            codes = self.codes["owner"]
+            order = np.argsort(codes, kind="stable")
+            bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[codes >= 0], minlength=len(self.uniques["owner"])))])
+            first = int(np.searchsorted(codes[order], 0))
+            for i, u in enumerate(self.uniques["owner"]):
+                self.shards[u] = order[first + bounds[i]:first + bounds[i + 1]]
+
+    def with_readiness(self, df: pd.DataFrame, version: str) -> "FilterIndex":
+        # Overlay refreshes only touch readiness: share every other bitmap with this index
+        idx = FilterIndex.__new__(FilterIndex)
+        idx.n = self.n
+        idx.version = version
+        idx.values = dict(self.values)
+        idx.codes = dict(self.codes)
+        idx.uniques = dict(self.uniques)
+        idx.counts = dict(self.counts)
+        idx.flags = self.flags
+        idx.flag_counts = self.flag_counts
+        idx.perms = dict(self.perms)
+        idx.ranks = dict(self.ranks)
+        idx.shards = self.shards
+        if READINESS_COL in df.columns:
+            idx._set_values(READINESS_COL, df[READINESS_COL])
+            for asc in (True, False):
+                idx._set_order(READINESS_COL, asc, df[READINESS_COL])
+        return idx
+
+    def _set_order(self, col: str, asc: bool, s: pd.Series) -> None:
+        perm = _sort_permutation(s, asc).astype(np.int32)
+        rank = np.empty(self.n, dtype=np.int32)
+        rank[perm] = np.arange(self.n, dtype=np.int32)
+        self.perms[(col, asc)] = perm
+        self.ranks[(col, asc)] = rank
+
+    def _set_values(self, col: str, s: pd.Series) -> None:
+        self.codes[col], self.uniques[col], self.values[col] = _value_index(s)
+        self.counts[col] = self.value_counts(col)
+
+    def value_counts(self, col: str, rows: Optional[np.ndarray] = None) -> Dict[Any, int]:
+        # Rows per distinct value, over all rows or just the given positions
+        codes = self.codes.get(col)
+        if codes is None:
+            return {}
+        if rows is not None:
+            codes = codes[rows]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.uniques[col]))
+        return dict(zip(self.uniques[col], counts.tolist()))
+
+    def full(self) -> np.ndarray:
+        return _pack(np.ones(self.n, dtype=bool))
+
+    def any_of(self, col: str, values: List[Any]) -> np.ndarray:
+        bitmaps = self.values.get(col, {})
+        out = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        for v in values:
+            bm = bitmaps.get(v)
+            if bm is not None:
+                out |= bm
+        return out
+
+    def rows(self, bits: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bits, count=self.n))
+
+    def sorted_rows(self, rows: np.ndarray, col: str, ascending: bool) -> Optional[np.ndarray]:
+        # Mask the column's permutation down to the selected rows (O(n)), or for a small selection
+        # order it by the precomputed ranks (O(k log k)); both give the same stable order
+        perm = self.perms.get((col, bool(ascending)))
+        if perm is None:
+            return None
+        if len(rows) * 16 < self.n:
+            return rows[np.argsort(self.ranks[(col, bool(ascending))][rows], kind="stable")]
+        keep = np.zeros(self.n, dtype=bool)
+        keep[rows] = True
+        return perm[keep[perm]].astype(np.int64)
+
+    def shard_rows(self, owners: List[Any]) -> np.ndarray:
+        # Sorted positions of the union of the owners' shards (shards are disjoint)
+        parts = [self.shards[o] for o in dict.fromkeys(owners) if o in self.shards]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts))
+
+    def value_test(self, col: str, values: List[Any], rows: np.ndarray) -> np.ndarray:
+        # isin evaluated on a row subset through the group codes
+        lut = np.zeros(len(self.uniques.get(col, [])) + 1, dtype=bool)
+        pos = {u: i for i, u in enumerate(self.uniques.get(col, []))}
+        for v in values:
+            if v in pos:
+                lut[pos[v] + 1] = True
+        return lut[self.codes[col][rows] + 1]
+
+
+_INDEX_LOCK = threading.Lock()
+_INDEXES: "OrderedDict[Tuple[str, float], FilterIndex]" = OrderedDict()
+
+
+def filter_index(dataset) -> FilterIndex:
+    # One index per loaded export, rebuilt for readiness only when the overlay moves
+    key = (dataset.path, dataset.mtime)
+    df, version = dataset.df, dataset.version
+    with _INDEX_LOCK:
+        idx = _INDEXES.get(key)
+        if idx is not None and idx.version == version:
+            _INDEXES.move_to_end(key)
+            return idx
+    idx = idx.with_readiness(df, version) if idx is not None and idx.n == len(df) else FilterIndex(df, version)
+    with _INDEX_LOCK:
+        _INDEXES[key] = idx
+        _INDEXES.move_to_end(key)
+        while len(_INDEXES) > 2:
+            _INDEXES.popitem(last=False)
+    return idx
+
 
 # Build filter options dynamically from available columns
 
-def build_options(df: pd.DataFrame) -> Dict[str, List[str]]:
+# Filter dimensions with options in filter_bar, keyed as in build_options
+FACET_COLUMNS = {
+    "readiness": READINESS_COL,
+    "lead_stage": "Leads_Stage",
+    "customer_stage": "Customers_Stage",
+    "states": "state",
+    "owners": "owner",
+}
+
+
+def build_options(df: pd.DataFrame, index: Optional[FilterIndex] = None) -> Dict[str, List[str]]:
+    # With an index the distinct values come from its per-version group codes
     opts: Dict[str, List[str]] = {}
     def uniq(col: str, limit: int = 50) -> List[str]:
+        if index is not None and col in index.uniques:
+            u = sorted({str(v) for v in index.uniques[col] if v})
+            return u[:limit]
         if col in df.columns:
-            vals = df[col].fillna("").astype(str)
-            u = sorted({v for v in vals if v})
+            vals = df[col].dropna().unique()
+            u = sorted({str(v) for v in vals if v})
             return u[:limit]
         return []
     opts["readiness"] = uniq("Initial_Readiness_level", 20)
@@ -21,6 +256,196 @@ def build_options(df: pd.DataFrame) -> Dict[str, List[str]]:
     return opts
 
 
+FACET_CACHE_SIZE = 64
+_FACETS_LOCK = threading.Lock()
+_FACETS: "OrderedDict[Tuple, Dict[str, Dict[str, int]]]" = OrderedDict()
+
+
+def facet_counts(
+    df: pd.DataFrame,
+    user: Dict[str, Any],
+    readiness: List[str],
+    lead_stage: List[str],
+    customer_stage: List[str],
+    states: List[str],
+    engagement: Dict[str, Any],
+    text_query: str,
+    owners_override: List[str] = None,
+    index: Optional[FilterIndex] = None,
+    search: Optional[SearchIndex] = None,
+    version: Optional[str] = None,
+    fuzzy: Optional[FuzzyIndex] = None,
+) -> Dict[str, Dict[str, int]]:
+    # Per-option counts under the current selection: each dimension counts the rows passing every
+    # other predicate, so "TX (1,204)" is what adding TX to the states would return. Counted over the
+    # owner shards like _filter_rows, and memoized per dataset version under the result-cache key
+    engagement = engagement or {}
+    key = _result_key(version, user, readiness, lead_stage, customer_stage, states, engagement, text_query,
+                      owners_override, "", True, fuzzy) if version else None
+    if key:
+        with _FACETS_LOCK:
+            hit = _FACETS.get(key)
+            if hit is not None:
+                _FACETS.move_to_end(key)
+                return {dim: dict(c) for dim, c in hit.items()}
+    idx = index if index is not None and index.n == len(df) else FilterIndex(df)
+    plan = compile_plan(idx, user, readiness, lead_stage, customer_stage, states, engagement, owners_override)
+    scope = next((step for step in plan.steps if step.owners is not None and idx.shards), None)
+    shared = [step for step in plan.steps if step.dim not in FACET_COLUMNS and step is not scope]
+    faceted = [step for step in plan.steps if step.dim in FACET_COLUMNS and step is not scope]
+    q = (text_query or "").strip().lower()
+    # Fuzzy mode keeps the best matches among the rows passing everything else, so it runs last per
+    # dimension; a substring match commutes with the predicates and runs once, up front
+    fuzzy_q = q if fuzzy is not None and fuzzy.n == len(df) else ""
+
+    def narrow(rows: np.ndarray, steps: List[PlanStep]) -> np.ndarray:
+        for step in steps:
+            if not len(rows):
+                break
+            rows = rows[step.mask(rows)]
+        return rows
+
+    def base(rows: np.ndarray) -> np.ndarray:
+        # Rows passing the predicates no facet drops (stage exclusions, checks, substring search)
+        rows = narrow(rows, shared)
+        if q and not fuzzy_q and len(rows):
+            if search is not None and search.n == len(df):
+                rows = search.match(q, df, within=rows)
+            else:
+                rows = rows[substring_rows(df.take(rows), q)]
+        return rows
+
+    scoped = base(idx.shard_rows(scope.owners) if scope is not None else np.arange(idx.n))
+    out: Dict[str, Dict[str, int]] = {}
+    for dim, col in FACET_COLUMNS.items():
+        if col not in idx.codes:
+            continue
+        if scope is not None and scope.dim == dim:
+            # A manager's Owners facet counts outside the selected owners' shards
+            rows = narrow(base(np.arange(idx.n)), faceted)
+        else:
+            rows = narrow(scoped, [step for step in faceted if step.dim != dim])
+        if fuzzy_q and len(rows):
+            rows, _ = fuzzy.top(fuzzy_q, within=rows)
+        out[dim] = {str(v): c for v, c in idx.value_counts(col, rows).items()}
+    if key:
+        with _FACETS_LOCK:
+            _FACETS[key] = out
+            while len(_FACETS) > FACET_CACHE_SIZE:
+                _FACETS.popitem(last=False)
+    return {dim: dict(c) for dim, c in out.items()}
+
+
+RESULT_CACHE_SIZE = 256
+# Byte budget across all entries (row positions plus sorters, int32 each), evicting least recent first
+RESULT_CACHE_BYTES = 128 * 2**20
+
+
+class ResultCache:
+    # Bounded LRU of filtered, sorted row positions shared across sessions; reruns that only click
+    # "Next name" or save a note reuse the positions instead of filtering again
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, max_bytes: int = RESULT_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        # Per entry, built on first position() call: argsort of the rows, for label -> position lookups
+        self._sorters: Dict[Tuple, np.ndarray] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple) -> Optional[np.ndarray]:
+        with self._lock:
+            rows = self._data.get(key)
+            if rows is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return rows
+
+    def _drop(self, key: Tuple) -> None:
+        rows = self._data.pop(key, None)
+        order = self._sorters.pop(key, None)
+        self._bytes -= (rows.nbytes if rows is not None else 0) + (order.nbytes if order is not None else 0)
+
+    def _evict(self) -> None:
+        # The newest entry stays even when it alone is over the byte budget
+        while len(self._data) > self.max_entries or (self._bytes > self.max_bytes and len(self._data) > 1):
+            self._drop(next(iter(self._data)))
+            self.evictions += 1
+
+    def put(self, key: Tuple, rows: np.ndarray) -> np.ndarray:
+        # Stored (and returned) as read-only int32 positions
+        rows = rows.astype(np.int32)
+        rows.setflags(write=False)
+        with self._lock:
+            self._drop(key)
+            self._data[key] = rows
+            self._bytes += rows.nbytes
+            self._evict()
+        return rows
+
+    def position(self, key: Tuple, label: int, n: int) -> Optional[int]:
+        # Position of dataset row label within the cached n-row result (-1 if absent), O(log n) once
+        # the entry's sorter exists; None when the entry is gone
+        with self._lock:
+            rows = self._data.get(key)
+            order = self._sorters.get(key)
+        if rows is None or len(rows) != n:
+            return None
+        if order is None:
+            order = np.argsort(rows, kind="stable").astype(np.int32)
+            with self._lock:
+                if self._data.get(key) is rows and key not in self._sorters:
+                    self._sorters[key] = order
+                    self._bytes += order.nbytes
+                    self._evict()
+        i = int(np.searchsorted(rows, label, sorter=order))
+        return int(order[i]) if i < len(rows) and rows[order[i]] == label else -1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+            }
+
+
+_RESULTS = ResultCache()
+
+
+def result_cache_stats() -> Dict[str, int]:
+    return _RESULTS.stats()
+
+
+def result_position(frame: pd.DataFrame, label: int) -> Optional[int]:
+    # For a frame returned by apply_filters with a version: position of a dataset row label in it,
+    # or None when the frame is not (or no longer) a cached result. Slices inherit attrs, hence the length check
+    key = frame.attrs.get("result_key")
+    return _RESULTS.position(key, label, len(frame)) if key is not None else None
+
+
+def _result_key(version, user, readiness, lead_stage, customer_stage, states, engagement, text_query,
+                owners_override, sort_by, sort_asc, fuzzy, priority=None) -> Tuple:
+    # Order-insensitive where the filter is (isin/AND); the label is rebuilt per call
+    role = (user or {}).get("role", "wolf_rep")
+    owners = tuple(sorted(owners_override)) if role == "manager" and owners_override else ()
+    return (
+        version, role, (user or {}).get("owner_value", ""), owners,
+        tuple(sorted(readiness or [])), tuple(sorted(lead_stage or [])),
+        tuple(sorted(customer_stage or [])), tuple(sorted(states or [])),
+        tuple(c for c in CHECK_COLUMNS if engagement.get(c, False)), engagement.get("interaction") or "",
+        (text_query or "").strip().lower(), fuzzy is not None, sort_by, bool(sort_asc),
+        priority.key if priority is not None and sort_by == PRIORITY_SORT else None,
+    )
+
+
 def apply_filters(
     df: pd.DataFrame,
     user: Dict[str, Any],
@@ -33,96 +458,240 @@ def apply_filters(
     owners_override: List[str] = None,
     sort_by: str = "display_name",
     sort_asc: bool = True,
+    index: Optional[FilterIndex] = None,
+    search: Optional[SearchIndex] = None,
+    fuzzy: Optional[FuzzyIndex] = None,
+    version: Optional[str] = None,
+    priority: Optional[PriorityScores] = None,
 ) -> Tuple[pd.DataFrame, str]:
-    f = df.copy()
+    # With a dataset version, results are memoized as row positions in the shared LRU
+    engagement = engagement or {}
+    args = (user, readiness, lead_stage, customer_stage, states, engagement, text_query, owners_override, sort_by, sort_asc)
+    key = _result_key(version, *args, fuzzy, priority) if version else None
+    rows = _RESULTS.get(key) if key else None
+    if rows is None:
+        rows = _filter_rows(df, *args, index, search, fuzzy, priority)
+        if key:
+            rows = _RESULTS.put(key, rows)
+    out = df.take(rows)
+    if key:
+        out.attrs["result_key"] = key
+    return out, _filter_label(readiness, lead_stage, states, engagement)
+
+
+SLOW_FILTER_MS = 250.0
+
+
+class PlanStep:
+    def __init__(self, dim: str, text: str, selectivity: float, build, test=None, owners: Optional[List[Any]] = None):
+        self.dim = dim                  # FACET_COLUMNS key, "scope", or the check column
+        self.text = text
+        self.selectivity = selectivity  # estimated fraction of rows kept
+        self.build = build              # () -> packed bitset over all rows
+        self.test = test                # (rows) -> bool mask for a row subset
+        self.owners = owners            # set on the owner-scope step: answered from shards
+        self.rows: Optional[int] = None
+        self.ms: Optional[float] = None
+
+    def bits(self) -> np.ndarray:
+        return self.build()
+
+    def mask(self, rows: np.ndarray) -> np.ndarray:
+        if self.test is not None:
+            return self.test(rows)
+        return _bit_test(self.build(), rows)
+
+
+class FilterPlan:
+    # Structured filter compiled to bitset predicates, applied most selective first and stopped as
+    # soon as nothing is left; describe() prints the order, estimates and per-step timings
+    def __init__(self, idx: FilterIndex, steps: List[PlanStep]):
+        self.idx = idx
+        # With owner shards the scope step is the entry point; the rest run most selective first
+        self.steps = sorted(steps, key=lambda step: (not (step.owners is not None and idx.shards), step.selectivity))
+        self.notes: List[Tuple[str, int, float]] = []
+        self.total_ms = 0.0
+        self.sharded = False
+
+    def execute(self) -> np.ndarray:
+        # Sorted positions of the rows passing every predicate
+        t0 = time.perf_counter()
+        scope = next((step for step in self.steps if step.owners is not None and self.idx.shards), None)
+        if scope is not None:
+            # Sharded: start from the scoped owners' rows and test the rest on that subset only
+            rows = self.idx.shard_rows(scope.owners)
+            scope.rows = len(rows)
+            scope.ms = (time.perf_counter() - t0) * 1e3
+            for step in self.steps:
+                if step is scope or not len(rows):
+                    continue
+                t = time.perf_counter()
+                rows = rows[step.mask(rows)]
+                step.rows = len(rows)
+                step.ms = (time.perf_counter() - t) * 1e3
+        else:
+            bits = self.idx.full()
+            for step in self.steps:
+                t = time.perf_counter()
+                bits &= step.bits()
+                step.rows = _popcount(bits)
+                step.ms = (time.perf_counter() - t) * 1e3
+                if not step.rows:
+                    break
+            rows = self.idx.rows(bits)
+        self.sharded = scope is not None
+        self.total_ms += (time.perf_counter() - t0) * 1e3
+        return rows
+
+    def note(self, text: str, rows: int, ms: float) -> None:
+        # Record a non-bitmap stage (text search, sort) for describe()
+        self.notes.append((text, rows, ms))
+        self.total_ms += ms
+
+    def describe(self) -> str:
+        n = max(self.idx.n, 1)
+        mode = "owner shards" if self.sharded else "bitmaps"
+        lines = [f"FilterPlan over {self.idx.n:,} rows ({mode}), {len(self.steps)} predicates, {self.total_ms:.1f} ms"]
+        for i, step in enumerate(self.steps, 1):
+            if step.ms is None:
+                lines.append(f"  {i}. {step.text}  est {step.selectivity:.1%}  skipped (empty)")
+            else:
+                lines.append(f"  {i}. {step.text}  est {step.selectivity:.1%}  -> {step.rows:,} rows ({step.rows / n:.1%})  {step.ms:.2f} ms")
+        for text, rows, ms in self.notes:
+            lines.append(f"  -  {text}  -> {rows:,} rows  {ms:.2f} ms")
+        return "\n".join(lines)
+
+
+def compile_plan(
+    idx: FilterIndex,
+    user: Dict[str, Any],
+    readiness: List[str],
+    lead_stage: List[str],
+    customer_stage: List[str],
+    states: List[str],
+    engagement: Dict[str, Any],
+    owners_override: Optional[List[str]],
+) -> FilterPlan:
+    # Selectivity estimates come from the index's per-version value and flag counts
+    n = max(idx.n, 1)
+    steps: List[PlanStep] = []
+
+    def isin(dim: str, col: str, values: List[Any], owners: bool = False) -> None:
+        counts = idx.counts.get(col, {})
+        est = min(1.0, sum(counts.get(v, 0) for v in set(values)) / n)
+        steps.append(PlanStep(dim, f"{col} in {list(values)}", est, lambda: idx.any_of(col, values),
+                              lambda rows: idx.value_test(col, values, rows), list(values) if owners else None))
 
     # Owner scope: wolf_rep sees own + Wolf Carports; manager may override
     role = (user or {}).get("role", "wolf_rep")
     owner_val = (user or {}).get("owner_value", "")
     if role == "manager" and owners_override:
-        f = f[f["owner"].isin(owners_override)]
+        isin("owners", "owner", owners_override, owners=True)
     else:
         allowed = [owner_val, "Wolf Carports"] if owner_val else ["Wolf Carports"]
-        if "owner" in f.columns:
-            f = f[f["owner"].isin(allowed)]
+        if "owner" in idx.values:
+            # A manager's default scope is what the Owners multiselect replaces
+            isin("owners" if role == "manager" else "scope", "owner", allowed, owners=True)
 
     # Exclude certain stages by default
-    EXCL = {"Cold Lead", "Payment confirmed", "Partial payment confirmed", "Direct purchase"}
-    if "Leads_Stage" in f.columns:
-        f = f[~f["Leads_Stage"].isin(EXCL)]
-    if "Customers_Stage" in f.columns:
-        f = f[~f["Customers_Stage"].isin(EXCL)]
+    for col in ("Leads_Stage", "Customers_Stage"):
+        if col in idx.values:
+            counts = idx.counts.get(col, {})
+            est = 1.0 - sum(counts.get(v, 0) for v in EXCLUDED_STAGES) / n
+            steps.append(PlanStep("scope", f"{col} not in excluded stages", est,
+                                  lambda col=col: ~idx.any_of(col, EXCLUDED_STAGES),
+                                  lambda rows, col=col: ~idx.value_test(col, EXCLUDED_STAGES, rows)))
 
     # Readiness filter (prefer overlay column if present)
-    read_col = "Initial_Readiness_level"
-    if readiness and read_col in f.columns:
-        f = f[f[read_col].isin(readiness)]
-
-    if lead_stage and "Leads_Stage" in f.columns:
-        f = f[f["Leads_Stage"].isin(lead_stage)]
-    if customer_stage and "Customers_Stage" in f.columns:
-        f = f[f["Customers_Stage"].isin(customer_stage)]
+    if readiness and READINESS_COL in idx.values:
+        isin("readiness", READINESS_COL, readiness)
+
+    if lead_stage and "Leads_Stage" in idx.values:
+        isin("lead_stage", "Leads_Stage", lead_stage)
+    if customer_stage and "Customers_Stage" in idx.values:
+        isin("customer_stage", "Customers_Stage", customer_stage)
     if states:
-        f = f[f["state"].isin(states)]
+        isin("states", "state", states)
 
     # Engagement toggles
-    def must_true(col: str) -> None:
-        nonlocal f
-        if col in f.columns and engagement.get(col, False):
-            f = f[f[col].astype(str).str.lower() == "true"]
-
-    for col in [
-        # Prior toggles
-        "Leads_NotCalledIn30Days", "Leads_LastCallLessthan30Days",
-        "Leads_Text_TextedWithIn30days", "Customers_Text_TextedWithIn30days",
-        "Leads_with_extended_calls", "Customers_with_extended_calls",
-        # New checks
-        "Initial_Readiness_level_Check", "Site_Prep_Status_Check",
-        "Permit_Status_Check", "Ready_to_install_in_Check",
-        "Leads_State_Check", "Number_of_quotes_Check", "Same_dimension_quotes_Check",
-        "Last_quote_dimensions_Check", "ProximityCheck", "EZ_Pay_Qualified",
-    ]:
-        must_true(col)
+    for col in CHECK_COLUMNS:
+        if col in idx.flags and engagement.get(col, False):
+            steps.append(PlanStep(col, f"{col} is true", idx.flag_counts[col] / n, lambda col=col: idx.flags[col]))
 
     # Interaction dropdown
-    inter = (engagement or {}).get("interaction") or ""
+    inter = engagement.get("interaction") or ""
     if inter:
-        keys_map = {
-            "Called": ["Leads_Called", "Customers_Called"],
-            "Spoken": ["Leads_Spoken", "Customers_Spoken"],
-            "RepeatedSpoken": ["Leads_RepeatedSpoken", "Customers_RepeatedSpoken"],
-        }
-        cols = keys_map.get(inter, [])
-        cols = [c for c in cols if c in f.columns]
+        cols = [c for c in INTERACTION_COLUMNS.get(inter, []) if c in idx.flags]
         if cols:
-            mask = False
-            for c in cols:
-                mask = (mask | (f[c].astype(str).str.lower() == "true")) if isinstance(mask, pd.Series) else (f[c].astype(str).str.lower() == "true")
-            f = f[mask]
+            def any_flag(cols=cols) -> np.ndarray:
+                out = idx.flags[cols[0]].copy()
+                for c in cols[1:]:
+                    out |= idx.flags[c]
+                return out
+            est = min(1.0, sum(idx.flag_counts[c] for c in cols) / n)
+            steps.append(PlanStep("interaction", f"any of {cols} is true", est, any_flag))
+    return FilterPlan(idx, steps)
+
+
+def _filter_rows(
+    df: pd.DataFrame,
+    user: Dict[str, Any],
+    readiness: List[str],
+    lead_stage: List[str],
+    customer_stage: List[str],
+    states: List[str],
+    engagement: Dict[str, Any],
+    text_query: str,
+    owners_override: Optional[List[str]],
+    sort_by: str,
+    sort_asc: bool,
+    index: Optional[FilterIndex],
+    search: Optional[SearchIndex],
+    fuzzy: Optional[FuzzyIndex],
+    priority: Optional[PriorityScores] = None,
+) -> np.ndarray:
+    idx = index if index is not None and index.n == len(df) else FilterIndex(df)
+    plan = compile_plan(idx, user, readiness, lead_stage, customer_stage, states, engagement, owners_override)
+    rows = plan.execute()
 
     # Text search
     q = (text_query or "").strip().lower()
-    if q:
-        def row_match(row) -> bool:
-            hay = [
-                str(row.get("display_name", "")),
-                str(row.get("primary_email", "")),
-                str(row.get("city", "")),
-                str(row.get("state", "")),
-            ]
-            # phones list
-            for p in row.get("all_phones", []) or []:
-                hay.append(str(p))
-            h = " ".join(hay).lower()
-            return q in h
-        f = f[f.apply(row_match, axis=1)]
+    ranked = False
+    t = time.perf_counter()
+    if q and len(rows) and fuzzy is not None and fuzzy.n == len(df):
+        # Fuzzy mode: best trigram matches first, replacing the sort order
+        rows, _ = fuzzy.top(q, within=rows)
+        ranked = True
+        plan.note(f"fuzzy top-k {q!r}", len(rows), (time.perf_counter() - t) * 1e3)
+    elif q and len(rows):
+        if search is not None and search.n == len(df):
+            rows = search.match(q, df, within=rows)
+        else:
+            rows = rows[substring_rows(df.take(rows), q)]
+        plan.note(f"text search {q!r}", len(rows), (time.perf_counter() - t) * 1e3)
 
     # Sorting
-    if sort_by not in f.columns:
-        sort_by = "display_name"
-    f = f.sort_values(by=sort_by, ascending=sort_asc, na_position="last")
+    if not ranked and sort_by == PRIORITY_SORT and priority is not None and len(priority.scores) == len(df):
+        # Best score first over the filtered rows only; cached with the result
+        t = time.perf_counter()
+        rows = priority.ranked(rows)
+        plan.note("sort by priority", len(rows), (time.perf_counter() - t) * 1e3)
+    elif not ranked:
+        if sort_by not in df.columns:
+            sort_by = "display_name"
+        t = time.perf_counter()
+        out = idx.sorted_rows(rows, sort_by, sort_asc)
+        rows = out if out is not None else rows[_sort_permutation(df[sort_by].take(rows), sort_asc)]
+        plan.note(f"sort by {sort_by} {'asc' if sort_asc else 'desc'}", len(rows), (time.perf_counter() - t) * 1e3)
+    if plan.total_ms > SLOW_FILTER_MS:
+        logger.warning("slow filter request\n%s", plan.describe())
+    else:
+        logger.debug("%s", plan.describe())
+    return rows
+
 
-    # Filter label
+def _filter_label(readiness: List[str], lead_stage: List[str], states: List[str], engagement: Dict[str, Any]) -> str:
+    inter = engagement.get("interaction") or ""
     label_parts = []
     if readiness:
         label_parts.append(f"Ready: {', '.join(readiness)}")
@@ -130,10 +699,9 @@ def apply_filters(
         label_parts.append(f"Stage: {', '.join(lead_stage)}")
     if states:
         label_parts.append(f"States: {', '.join(states)}")
-    for k, v in (engagement or {}).items():
+    for k, v in engagement.items():
         if isinstance(v, bool) and v:
             label_parts.append(k.replace("_", " "))
     if inter:
         label_parts.append(inter)
-    label = " AND ".join(label_parts) if label_parts else "All"
-    return f, label
+    return " AND ".join(label_parts) if label_parts else "All"
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import readiness as rd
+
+# "Next best lead": one composite score per lead, computed for the whole frame in a single
+# vectorized pass. The filtered rows are then sorted by score (O(m log m) in the filtered set, not the
+# frame); the order is memoized with the rest of the filter result in the result cache
+
+PRIORITY_SORT = "Priority"
+WEIGHTS_PATH = "data/priority_weights.json"
+
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "readiness": 0.35,   # overlay score, else the export's readiness level
+    "value": 0.25,       # value_proxy_num (last quote total)
+    "staleness": 0.20,   # days since the last call/text, so untouched leads come back up
+    "checks": 0.20,      # share of sales-indicator / readiness checks that are true
+}
+
+CHECK_COLUMNS = [
+    "Initial_Readiness_level_Check", "Site_Prep_Status_Check", "Permit_Status_Check",
+    "Ready_to_install_in_Check", "Leads_State_Check", "Number_of_quotes_Check",
+    "Same_dimension_quotes_Check", "Last_quote_dimensions_Check", "ProximityCheck", "EZ_Pay_Qualified",
+]
+
+STALE_AFTER_DAYS = 30.0
+
+# Best reachable readiness score: land points only count when the site is not ready, and the
+# financing-company points only when financing is required (which scores 0 itself)
+READINESS_MAX = sum(max(v.values()) for k, v in rd.SCORES.items() if k not in ("land_status", "financing_company"))
+
+
+def load_weights(path: str = WEIGHTS_PATH) -> Dict[str, float]:
+    weights = dict(DEFAULT_WEIGHTS)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for k, v in json.load(f).items():
+                if k in weights:
+                    weights[k] = max(0.0, float(v))
+    except Exception:
+        pass
+    return weights
+
+
+def save_weights(weights: Dict[str, float], path: str = WEIGHTS_PATH) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({k: float(weights.get(k, 0.0)) for k in DEFAULT_WEIGHTS}, f, indent=2)
+
+
+def _readiness_component(df: pd.DataFrame) -> np.ndarray:
+    n = len(df)
+    out = np.zeros(n)
+    if "Initial_Readiness_level" in df.columns:
+        # "Level 3" -> 3/4, parsed once per distinct label
+        codes, uniques = pd.factorize(df["Initial_Readiness_level"], use_na_sentinel=False)
+        level = pd.Series(uniques.astype(object).astype(str)).str.extract(r"(\d+)", expand=False)
+        level = np.clip(pd.to_numeric(level, errors="coerce").fillna(0).to_numpy(dtype=float) / 4.0, 0.0, 1.0)
+        out = level[codes] if len(codes) else out
+    if "Readiness_Score" in df.columns:
+        score = df["Readiness_Score"].to_numpy(dtype=float)
+        has = ~np.isnan(score)
+        out[has] = np.clip(score[has] / READINESS_MAX, 0.0, 1.0)
+    return out
+
+
+def _value_component(df: pd.DataFrame) -> np.ndarray:
+    if "value_proxy_num" not in df.columns:
+        return np.zeros(len(df))
+    v = np.log1p(np.clip(df["value_proxy_num"].to_numpy(dtype=float, na_value=0.0), 0.0, None))
+    top = np.percentile(v, 95) if len(v) else 0.0
+    return np.clip(v / top, 0.0, 1.0) if top > 0 else np.zeros(len(df))
+
+
+def _staleness_component(df: pd.DataFrame, now: pd.Timestamp) -> np.ndarray:
+    n = len(df)
+    last = np.full(n, np.datetime64("NaT"), dtype="datetime64[ns]")
+    for col in ("last_call_dt", "last_text_dt"):
+        if col in df.columns:
+            t = pd.to_datetime(df[col], errors="coerce").to_numpy(dtype="datetime64[ns]")
+            last = np.where(np.isnat(last) | (~np.isnat(t) & (t > last)), t, last)
+    days = (np.datetime64(now.tz_localize(None).to_datetime64(), "ns") - last) / np.timedelta64(1, "D")
+    # Never contacted counts as fully stale
+    return np.where(np.isnat(last), 1.0, np.clip(days / STALE_AFTER_DAYS, 0.0, 1.0))
+
+
+def _checks_component(df: pd.DataFrame) -> np.ndarray:
+    cols = [c for c in CHECK_COLUMNS if c in df.columns]
+    if not cols:
+        return np.zeros(len(df))
+    total = np.zeros(len(df))
+    for c in cols:
+        s = df[c]
+        if isinstance(s.dtype, pd.BooleanDtype):
+            total += s.fillna(False).to_numpy(dtype=bool)
+        else:
+            total += (s.astype(str).str.lower() == "true").to_numpy()
+    return total / len(cols)
+
+
+def compute_scores(df: pd.DataFrame, weights: Optional[Dict[str, float]] = None, now: Optional[pd.Timestamp] = None) -> np.ndarray:
+    # Weighted mean of the components, each in [0, 1]; returns one score per row in [0, 1]
+    weights = weights or DEFAULT_WEIGHTS
+    now = now if now is not None else pd.Timestamp.utcnow()
+    parts = {
+        "readiness": _readiness_component,
+        "value": _value_component,
+        "staleness": lambda d: _staleness_component(d, now),
+        "checks": _checks_component,
+    }
+    total_w = sum(max(0.0, weights.get(k, 0.0)) for k in parts)
+    score = np.zeros(len(df))
+    if total_w <= 0:
+        return score
+    for k, fn in parts.items():
+        w = max(0.0, weights.get(k, 0.0))
+        if w:
+            score += w * fn(df)
+    return score / total_w
+
+
+@dataclass
+class PriorityScores:
+    scores: np.ndarray
+    key: Tuple
+
+    def ranked(self, rows: np.ndarray) -> np.ndarray:
+        # Every given row, best first (ties by export order)
+        return rows[np.lexsort((rows, -self.scores[rows]))]
+
+
+_LOCK = threading.Lock()
+_SCORES: "OrderedDict[Tuple, PriorityScores]" = OrderedDict()
+
+
+def priority_scores(dataset, weights: Optional[Dict[str, float]] = None) -> PriorityScores:
+    # Cached per dataset version, weights and day (staleness moves with the date)
+    weights = weights or load_weights()
+    key = (dataset.version, tuple(sorted(weights.items())), pd.Timestamp.utcnow().strftime("%Y-%m-%d"))
+    with _LOCK:
+        hit = _SCORES.get(key)
+        if hit is not None:
+            _SCORES.move_to_end(key)
+            return hit
+    ps = PriorityScores(compute_scores(dataset.df, weights), key)
+    with _LOCK:
+        _SCORES[key] = ps
+        while len(_SCORES) > 4:
+            _SCORES.popitem(last=False)
+    return ps
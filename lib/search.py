@@ -0,0 +1,270 @@
+import re
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Workspace text search: an inverted index over the whitespace tokens of each lead's search text
+# (display name, primary email, city, state and every phone). A query term matches any token that
+# contains it, so results keep the original "substring of the joined row text" semantics.
+
+SEARCH_FIELDS = ["display_name", "primary_email", "city", "state"]
+_SEP = "\x00"
+TERM_CACHE_SIZE = 256
+# Share of the vocabulary above which a term counts as common: its tokens come from one containment
+# test per token and its rows from one masked pass over all postings
+DENSE_TERM_SHARE = 0.125
+
+
+def haystacks(df: pd.DataFrame) -> List[str]:
+    # The lowercased text a row is searched by (str() of each field, so missing values read "nan"/"None")
+    n = len(df)
+    cols = [df[c].astype(object).astype(str).tolist() if c in df.columns else [""] * n for c in SEARCH_FIELDS]
+    phones = df["all_phones"].tolist() if "all_phones" in df.columns else [None] * n
+    out = []
+    for name, email, city, state, ph in zip(*cols, phones):
+        parts = [name, email, city, state]
+        if ph is not None and len(ph):
+            parts.extend(str(p) for p in ph)
+        out.append(" ".join(parts).lower())
+    return out
+
+
+def substring_rows(df: pd.DataFrame, q: str) -> np.ndarray:
+    # Unindexed fallback: positions of rows whose search text contains q
+    return np.array([i for i, h in enumerate(haystacks(df)) if q in h], dtype=np.int64)
+
+
+class SearchIndex:
+    def __init__(self, df: pd.DataFrame):
+        self.n = len(df)
+        hay = haystacks(df)
+        tokens = [h.split() for h in hay]
+        counts = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=self.n)
+        flat = [t for ts in tokens for t in ts]
+        codes, vocab = pd.factorize(pd.Series(flat, dtype=object))
+        # Postings in CSR form: rows of token i are rows[offsets[i]:offsets[i + 1]]
+        row_of = np.repeat(np.arange(self.n, dtype=np.int64), counts)
+        order = np.argsort(codes, kind="stable")
+        self.rows = row_of[order]
+        self._token_of = codes[order].astype(np.int32)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(vocab)))])
+        self.vocab: List[str] = list(vocab)
+        # All tokens in one string so a term scan runs in C rather than per token
+        self._blob = _SEP.join(self.vocab)
+        self._starts = np.concatenate([[0], np.cumsum([len(t) + 1 for t in self.vocab])[:-1]]).astype(np.int64)
+        self._terms: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _tokens_for(self, term: str) -> np.ndarray:
+        # Ids of vocabulary tokens containing term; a term extending a cached one (typing "joh" -> "john")
+        # only rescans the tokens that matched the shorter term
+        with self._lock:
+            hit = self._terms.get(term)
+            if hit is not None:
+                self._terms.move_to_end(term)
+                return hit
+            base = None
+            for prev, ids in reversed(self._terms.items()):
+                if prev in term and (base is None or len(ids) < len(base)):
+                    base = ids
+        if _SEP in term:
+            ids = np.empty(0, dtype=np.int64)
+        elif base is not None:
+            ids = np.array([i for i in base if term in self.vocab[i]], dtype=np.int64)
+        else:
+            # Collect occurrences up to the common-term limit; past it, test each token instead
+            limit = int(DENSE_TERM_SHARE * len(self.vocab))
+            found = islice(re.finditer(re.escape(term), self._blob), limit + 1)
+            pos = np.fromiter((m.start() for m in found), dtype=np.int64)
+            if len(pos) > limit:
+                ids = np.flatnonzero(np.fromiter((term in t for t in self.vocab), dtype=bool, count=len(self.vocab)))
+            else:
+                ids = np.unique(np.searchsorted(self._starts, pos, side="right") - 1)
+        with self._lock:
+            self._terms[term] = ids
+            while len(self._terms) > TERM_CACHE_SIZE:
+                self._terms.popitem(last=False)
+        return ids
+
+    def _postings(self, ids: np.ndarray) -> np.ndarray:
+        # Sorted rows holding any of the tokens
+        if not len(ids):
+            return np.empty(0, dtype=np.int64)
+        if len(ids) > DENSE_TERM_SHARE * len(self.vocab):
+            hit = np.zeros(len(self.vocab), dtype=bool)
+            hit[ids] = True
+            got = self.rows[hit[self._token_of]]
+        else:
+            # CSR gather: each token's start repeated over its postings, plus a running offset
+            lens = self.offsets[ids + 1] - self.offsets[ids]
+            ends = np.cumsum(lens)
+            got = self.rows[np.repeat(self.offsets[ids] - ends + lens, lens) + np.arange(ends[-1])]
+            if len(got) * 4 < self.n:
+                return np.unique(got)
+        mark = np.zeros(self.n, dtype=bool)
+        mark[got] = True
+        return np.flatnonzero(mark)
+
+    def match(self, q: str, df: Optional[pd.DataFrame] = None, within: Optional[np.ndarray] = None) -> np.ndarray:
+        # Sorted positions of rows whose search text contains q (already stripped and lowercased)
+        terms = q.split()
+        if not terms:
+            return np.arange(self.n) if within is None else within
+        cand = within
+        for t in sorted(terms, key=len, reverse=True):
+            rows = self._postings(self._tokens_for(t))
+            cand = rows if cand is None else np.intersect1d(cand, rows, assume_unique=True)
+            if not len(cand):
+                return cand
+        if len(terms) > 1 or q != terms[0]:
+            # Several terms must also be adjacent in the row text: check the surviving candidates
+            if df is None:
+                return np.empty(0, dtype=np.int64)
+            hay = haystacks(df.take(cand))
+            cand = cand[np.array([q in h for h in hay], dtype=bool)]
+        return cand
+
+
+_INDEX_LOCK = threading.Lock()
+_INDEXES: "OrderedDict[Tuple[str, float], SearchIndex]" = OrderedDict()
+
+
+def search_index(dataset) -> SearchIndex:
+    # One index per loaded export; readiness overlays never touch the searched fields
+    key = (dataset.path, dataset.mtime)
+    with _INDEX_LOCK:
+        idx = _INDEXES.get(key)
+        if idx is not None:
+            _INDEXES.move_to_end(key)
+            return idx
+    idx = SearchIndex(dataset.df)
+    with _INDEX_LOCK:
+        _INDEXES[key] = idx
+        while len(_INDEXES) > 2:
+            _INDEXES.popitem(last=False)
+    return idx
+
+
+# Fuzzy lookup for misspelled callbacks ("Jonh Smiht"): a trigram index over the distinct words of
+# names and emails finds candidate spellings, which are re-ranked by edit distance
+
+FUZZY_FIELDS = ["display_name", "Leads_NormName", "Customers_NormName"]
+FUZZY_TOP_K = 50
+FUZZY_WORD_CANDIDATES = 256
+FUZZY_MIN_WORD_SIM = 0.5
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def trigrams(word: str) -> List[str]:
+    # pg_trgm-style padding: two leading blanks, one trailing
+    w = "  " + word + " "
+    return sorted({w[i:i + 3] for i in range(len(w) - 2)})
+
+
+def edit_similarity(a: str, b: str) -> float:
+    # 1 - optimal-string-alignment distance / longer length (adjacent swaps cost one edit)
+    if a == b:
+        return 1.0
+    la, lb = len(a), len(b)
+    if not la or not lb:
+        return 0.0
+    prev2 = None
+    prev = list(range(lb + 1))
+    for i in range(1, la + 1):
+        cur = [i] + [0] * lb
+        for j in range(1, lb + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return 1.0 - prev[lb] / max(la, lb)
+
+
+def _csr(owner: np.ndarray, codes: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(codes, kind="stable")
+    return owner[order], np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=size))])
+
+
+class FuzzyIndex:
+    def __init__(self, df: pd.DataFrame):
+        self.n = len(df)
+        texts = [df[c].astype(object).reset_index(drop=True) for c in FUZZY_FIELDS if c in df.columns]
+        if "all_emails" in df.columns:
+            texts.append(df["all_emails"].reset_index(drop=True).explode())
+        texts = pd.concat(texts) if texts else pd.Series([], dtype=object)
+        # .str yields NaN for missing/non-text values, which explode/dropna discard
+        words = texts.str.lower().str.findall(_WORD_RE).explode().dropna()
+        codes, vocab = pd.factorize(words)
+        self.vocab: List[str] = list(vocab)
+        # Word -> rows postings (a row may repeat under a word; scoring takes the max)
+        self.word_rows, self.word_offsets = _csr(words.index.to_numpy(dtype=np.int64), codes, len(vocab))
+        # Trigram -> words postings over the (much smaller) vocabulary
+        grams = [trigrams(w) for w in self.vocab]
+        self.gram_count = np.fromiter((len(g) for g in grams), dtype=np.int64, count=len(grams))
+        gram_codes, gram_vocab = pd.factorize(pd.Series([g for gs in grams for g in gs], dtype=object))
+        owner = np.repeat(np.arange(len(grams), dtype=np.int64), self.gram_count)
+        self.gram_words, self.gram_offsets = _csr(owner, gram_codes, len(gram_vocab))
+        self.gram_ids: Dict[str, int] = {g: i for i, g in enumerate(gram_vocab)}
+
+    def similar_words(self, word: str) -> Tuple[np.ndarray, np.ndarray]:
+        # Vocabulary words close to word: best trigram overlaps, re-ranked by edit similarity
+        qgrams = trigrams(word)
+        ids = [self.gram_ids[g] for g in qgrams if g in self.gram_ids]
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        hits = np.concatenate([self.gram_words[self.gram_offsets[i]:self.gram_offsets[i + 1]] for i in ids])
+        cand, shared = np.unique(hits, return_counts=True)
+        if len(cand) > FUZZY_WORD_CANDIDATES:
+            jaccard = shared / (len(qgrams) + self.gram_count[cand] - shared)
+            cand = cand[np.argpartition(-jaccard, FUZZY_WORD_CANDIDATES - 1)[:FUZZY_WORD_CANDIDATES]]
+        sims = np.array([edit_similarity(word, self.vocab[c]) for c in cand])
+        keep = sims >= FUZZY_MIN_WORD_SIM
+        return cand[keep], sims[keep]
+
+    def top(self, q: str, k: int = FUZZY_TOP_K, within: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # Row positions of the k best matches, best first, scored by the mean best-word similarity
+        qwords = _WORD_RE.findall(q.lower())
+        if not qwords or not self.n:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        score = np.zeros(self.n)
+        for w in qwords:
+            cand, sims = self.similar_words(w)
+            if not len(cand):
+                continue
+            lens = self.word_offsets[cand + 1] - self.word_offsets[cand]
+            rows = np.concatenate([self.word_rows[self.word_offsets[c]:self.word_offsets[c + 1]] for c in cand])
+            best = np.zeros(self.n)
+            np.maximum.at(best, rows, np.repeat(sims, lens))
+            score += best
+        score /= len(qwords)
+        if within is not None:
+            keep = np.zeros(self.n, dtype=bool)
+            keep[within] = True
+            score[~keep] = 0.0
+        hit = np.flatnonzero(score > 0)
+        if len(hit) > k:
+            hit = hit[np.argpartition(-score[hit], k - 1)[:k]]
+        hit = hit[np.lexsort((hit, -score[hit]))]
+        return hit, score[hit]
+
+
+_FUZZY: "OrderedDict[Tuple[str, float], FuzzyIndex]" = OrderedDict()
+
+
+def fuzzy_index(dataset) -> FuzzyIndex:
+    key = (dataset.path, dataset.mtime)
+    with _INDEX_LOCK:
+        idx = _FUZZY.get(key)
+        if idx is not None:
+            _FUZZY.move_to_end(key)
+            return idx
+    idx = FuzzyIndex(dataset.df)
+    with _INDEX_LOCK:
+        _FUZZY[key] = idx
+        while len(_FUZZY) > 2:
+            _FUZZY.popitem(last=False)
+    return idx
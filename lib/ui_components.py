@@ -2,8 +2,11 @@
 import json
 from typing import Dict, Any, List, Optional
 import streamlit as st
+import numpy as np
 import pandas as pd
 from .data_loader import normalize_us_phone
+from .filters import SORT_COLUMNS, result_position
+from .priority import PRIORITY_SORT
 from . import actions
 from . import justcall_client
 from . import readiness as rd
@@ -136,58 +139,111 @@ def header(user: Dict[str, Any]):
         st.markdown("<div style='text-align:center; font-weight:600; margin-top:-8px; margin-left:-10px;'>Wolf Carports</div>", unsafe_allow_html=True)
 
 
-def filter_bar(opts: Dict[str, List[str]], is_manager: bool) -> Dict[str, Any]:
+# Filter toggles as (column, label, widget key), in display order per group
+READY_TOGGLES = [
+    ("Site_Prep_Status_Check", "Site ready check", "chk_site_ready"),
+    ("Permit_Status_Check", "Permit check", "chk_permit"),
+    ("Ready_to_install_in_Check", "Install asap check", "chk_asap"),
+    ("Initial_Readiness_level_Check", "Ready level check", "chk_ready_lvl"),
+]
+ENGAGEMENT_TOGGLES = [
+    ("Leads_NotCalledIn30Days", "NotCalled30days", "eng_nc30"),
+    ("Leads_Text_TextedWithIn30days", "Nottexted30days", "eng_txt30"),
+    ("Leads_with_extended_calls", "ExtendedCalls", "eng_ext"),
+]
+SALES_TOGGLES = [
+    ("Leads_State_Check", "FastStates", "sl_fast"),
+    ("Number_of_quotes_Check", ">8quotes", "sl_gt8q"),
+    ("Same_dimension_quotes_Check", ">3sameSizeQuotes", "sl_gt3same"),
+    ("Last_quote_dimensions_Check", "<30wide", "sl_lt30"),
+    ("EZ_Pay_Qualified", "EZ_Pay_Qualified", "sl_ezpay"),
+]
+PROXIMITY_TOGGLES = [("ProximityCheck", "ProximityCheck", "prox")]
+
+# Multiselects that show facet counts, keyed like build_options
+FACET_KEYS = {
+    "readiness": "flt_readiness",
+    "lead_stage": "flt_lead_stage",
+    "customer_stage": "flt_customer_stage",
+    "states": "flt_states",
+    "owners": "flt_owners",
+}
+
+
+def _state_params(is_manager: bool) -> Dict[str, Any]:
+    # Current filter selection read from widget state, before the widgets render this run
+    ss = st.session_state
+    engagement = {col: bool(ss.get(key, False)) for col, _, key in READY_TOGGLES + ENGAGEMENT_TOGGLES + SALES_TOGGLES + PROXIMITY_TOGGLES}
+    engagement["interaction"] = ss.get("flt_interact", "")
+    return {
+        "readiness": ss.get("flt_readiness", []),
+        "lead_stage": ss.get("flt_lead_stage", []),
+        "customer_stage": ss.get("flt_customer_stage", []),
+        "states": ss.get("flt_states", []),
+        "engagement": engagement,
+        "text_query": ss.get("flt_q", ""),
+        "fuzzy": bool(ss.get("flt_fuzzy", False)),
+        "owners_override": ss.get("flt_owners") if is_manager else None,
+    }
+
+
+def filter_bar(opts: Dict[str, List[str]], is_manager: bool, facets=None) -> Dict[str, Any]:
+    # facets: optional callable(params) -> {dimension: {option: count}} for "TX (1,204)" labels
+    counts: Dict[str, Dict[str, int]] = {}
+    if facets is not None:
+        try:
+            counts = facets(_state_params(is_manager)) or {}
+        except Exception:
+            counts = {}
+        # Count labels change the widget identity; re-pin selections so they survive it
+        for key in FACET_KEYS.values():
+            if key in st.session_state:
+                st.session_state[key] = st.session_state[key]
+
+    def fmt(dim: str):
+        c = counts.get(dim)
+        if c is None:
+            return str
+        return lambda v: f"{v} ({c.get(v, 0):,})"
+
     with st.container():
         # Group: Readiness stages
         st.markdown("##### Readiness stages")
         cols = st.columns([2,2,2,2,2])
-        readiness = cols[0].multiselect("Readiness level", opts.get("readiness", []), key="flt_readiness")
-        lead_stage = cols[1].multiselect("Lead Stage", opts.get("lead_stage", []), key="flt_lead_stage")
-        customer_stage = cols[2].multiselect("Customer Stage", opts.get("customer_stage", []), key="flt_customer_stage")
-        states = cols[3].multiselect("States", opts.get("states", []), key="flt_states")
+        readiness = cols[0].multiselect("Readiness level", opts.get("readiness", []), key="flt_readiness", format_func=fmt("readiness"))
+        lead_stage = cols[1].multiselect("Lead Stage", opts.get("lead_stage", []), key="flt_lead_stage", format_func=fmt("lead_stage"))
+        customer_stage = cols[2].multiselect("Customer Stage", opts.get("customer_stage", []), key="flt_customer_stage", format_func=fmt("customer_stage"))
+        states = cols[3].multiselect("States", opts.get("states", []), key="flt_states", format_func=fmt("states"))
         text_query = cols[4].text_input("Search", "", key="flt_q")
+        fuzzy = cols[4].toggle("Fuzzy match", value=False, key="flt_fuzzy", help="Tolerate typos in names and emails; best matches first")
 
         c_r1 = st.columns([1,1,1,1])
-        ready_checks = {
-            "Site_Prep_Status_Check": c_r1[0].toggle("Site ready check", value=False, key="chk_site_ready"),
-            "Permit_Status_Check": c_r1[1].toggle("Permit check", value=False, key="chk_permit"),
-            "Ready_to_install_in_Check": c_r1[2].toggle("Install asap check", value=False, key="chk_asap"),
-            "Initial_Readiness_level_Check": c_r1[3].toggle("Ready level check", value=False, key="chk_ready_lvl"),
-        }
+        ready_checks = {col: c_r1[i].toggle(label, value=False, key=key) for i, (col, label, key) in enumerate(READY_TOGGLES)}
 
         # Group: Engagement
         st.markdown("##### Engagement")
         c_e1 = st.columns([1,1,1,2])
-        eng = {
-            "Leads_NotCalledIn30Days": c_e1[0].toggle("NotCalled30days", value=False, key="eng_nc30"),
-            "Leads_Text_TextedWithIn30days": c_e1[1].toggle("Nottexted30days", value=False, key="eng_txt30"),
-            "Leads_with_extended_calls": c_e1[2].toggle("ExtendedCalls", value=False, key="eng_ext"),
-        }
+        eng = {col: c_e1[i].toggle(label, value=False, key=key) for i, (col, label, key) in enumerate(ENGAGEMENT_TOGGLES)}
         interaction = c_e1[3].selectbox("Interaction", ["", "Called", "Spoken", "RepeatedSpoken"], key="flt_interact")
 
         # Group: Sales indicators
         st.markdown("##### Sales indicators")
         c_s1 = st.columns([1,1,1,1,1])
-        sales = {
-            "Leads_State_Check": c_s1[0].toggle("FastStates", value=False, key="sl_fast"),
-            "Number_of_quotes_Check": c_s1[1].toggle(">8quotes", value=False, key="sl_gt8q"),
-            "Same_dimension_quotes_Check": c_s1[2].toggle(">3sameSizeQuotes", value=False, key="sl_gt3same"),
-            "Last_quote_dimensions_Check": c_s1[3].toggle("<30wide", value=False, key="sl_lt30"),
-            "EZ_Pay_Qualified": c_s1[4].toggle("EZ_Pay_Qualified", value=False, key="sl_ezpay"),
-        }
+        sales = {col: c_s1[i].toggle(label, value=False, key=key) for i, (col, label, key) in enumerate(SALES_TOGGLES)}
 
         # Group: ProximityReport
         st.markdown("##### ProximityReport")
-        prox = {"ProximityCheck": st.toggle("ProximityCheck", value=False, key="prox")}
+        prox = {col: st.toggle(label, value=False, key=key) for col, label, key in PROXIMITY_TOGGLES}
 
         owners_override = None
         if is_manager and opts.get("owners"):
-            owners_override = st.multiselect("Owners", opts.get("owners"), key="flt_owners")
+            owners_override = st.multiselect("Owners", opts.get("owners"), key="flt_owners", format_func=fmt("owners"))
 
         # Sorting
         scol1, scol2, scol3 = st.columns([1,1,1])
-        sort_by = scol1.selectbox("Sort by", ["display_name","state","Leads_Stage","Initial_Readiness_level","last_call_dt","last_text_dt","value_proxy_num"], key="flt_sort_by")
-        sort_asc = scol2.toggle("Ascending", value=True, key="flt_sort_asc")
+        sort_by = scol1.selectbox("Sort by", SORT_COLUMNS + [PRIORITY_SORT], key="flt_sort_by",
+                                  help=f"{PRIORITY_SORT} ranks every match by call priority, best first")
+        sort_asc = scol2.toggle("Ascending", value=True, key="flt_sort_asc", disabled=sort_by == PRIORITY_SORT)
         if scol3.button("Reset All Filters"):
             for k in list(st.session_state.keys()):
                 if k.startswith("flt_") or k.startswith("eng_") or k.startswith("chk_") or k.startswith("sl_") or k == "prox":
@@ -203,32 +259,88 @@ def filter_bar(opts: Dict[str, List[str]], is_manager: bool) -> Dict[str, Any]:
             "states": states,
             "engagement": engagement,
             "text_query": text_query,
+            "fuzzy": fuzzy,
             "owners_override": owners_override,
             "sort_by": sort_by,
             "sort_asc": sort_asc,
         }
 
 
-def lead_list(df: pd.DataFrame, selected_id: Optional[str]) -> Optional[str]:
+LEAD_PAGE_SIZES = [25, 50, 100, 200]
+
+
+def _frame_position(df: pd.DataFrame, entity_id: Optional[str], positions_of=None) -> int:
+    # Position of entity_id within df: dataset row label from the caller's entity index, then a
+    # lookup in the cached filter result (sorter kept beside the entry); falls back to a vectorized scan
+    if entity_id is None or not len(df):
+        return -1
+    if positions_of is not None and df.index.dtype.kind in "iu":
+        found = positions_of([entity_id])
+        if not len(found):
+            return -1
+        label = int(found[0])
+        pos = result_position(df, label)
+        if pos is not None:
+            return pos
+        hit = np.flatnonzero(df.index.to_numpy() == label)
+        return int(hit[0]) if len(hit) else -1
+    hit = np.flatnonzero(df["EntityId"].to_numpy() == entity_id)
+    return int(hit[0]) if len(hit) else -1
+
+
+def _select_lead(entity_id: str):
+    st.session_state["selected_id"] = entity_id
+
+
+def _pick_lead():
+    st.session_state["selected_id"] = st.session_state.get("lead_pick")
+
+
+def lead_list(df: pd.DataFrame, selected_id: Optional[str], positions_of=None) -> Optional[str]:
+    # Paginated: only the page holding the selection is rendered and labelled; Previous/Next
+    # step across page boundaries and the page follows the selection
     view_cols = ["display_name","primary_phone","city","state","Initial_Readiness_level","Leads_Stage","last_call_dt","last_text_dt","value_proxy_num","EZ_Pay_Qualified"]
     avail = [c for c in view_cols if c in df.columns]
-    st.dataframe(df[avail].head(500), use_container_width=True, hide_index=True)
-    ids = df["EntityId"].tolist()
-    labels = [f"{r.display_name} ({r.city}, {r.state}) — {r.primary_phone or ''}" for _, r in df.iterrows()]
-    if selected_id in ids:
-        idx = ids.index(selected_id)
-    else:
-        idx = 0 if ids else -1
-    if not ids:
+    n = len(df)
+    if not n:
+        st.dataframe(df[avail], use_container_width=True, hide_index=True)
         return None
-    sel = st.selectbox("Select lead", options=list(range(len(ids))), format_func=lambda i: labels[i], index=idx if idx>=0 else 0)
-    navc1, navc2, navc3 = st.columns([1,1,8])
-    if navc1.button("Previous name") and sel > 0:
-        sel -= 1
-    if navc2.button("Next name") and sel < len(ids)-1:
-        sel += 1
-    st.session_state["selected_index"] = sel
-    return ids[sel]
+    size = st.session_state.get("lead_page_size", LEAD_PAGE_SIZES[1])
+    pos = _frame_position(df, selected_id, positions_of)
+    if pos < 0:
+        pos = 0
+    pages = (n + size - 1) // size
+    page = pos // size
+    start, end = page * size, min(n, page * size + size)
+    window = df.iloc[start:end]
+    st.dataframe(window[avail], use_container_width=True, hide_index=True)
+
+    ids = window["EntityId"].tolist()
+    # One IN query per table warms notes/actions/readiness for the whole page
+    actions.prefetch_activity(ids)
+    labels = {
+        eid: f"{nm} ({city}, {state}) — {phone or ''}"
+        for eid, nm, city, state, phone in zip(ids, window["display_name"], window["city"], window["state"], window["primary_phone"])
+    }
+    sel_id = ids[pos - start]
+    st.session_state["lead_pick"] = sel_id
+    st.selectbox("Select lead", options=ids, format_func=lambda e: labels.get(e, e), key="lead_pick", on_change=_pick_lead)
+
+    # Neighbours are looked up by position, so stepping off the page just moves to the next window
+    prev_id = df["EntityId"].iat[pos - 1] if pos > 0 else None
+    next_id = df["EntityId"].iat[pos + 1] if pos < n - 1 else None
+    prev_page = df["EntityId"].iat[start - size] if page > 0 else None
+    next_page = df["EntityId"].iat[end] if end < n else None
+    navc1, navc2, navc3, navc4, navc5, navc6 = st.columns([1,1,1,1,2,2])
+    navc1.button("Previous name", disabled=prev_id is None, on_click=_select_lead, args=(prev_id,))
+    navc2.button("Next name", disabled=next_id is None, on_click=_select_lead, args=(next_id,))
+    navc3.button("◀ Page", disabled=prev_page is None, on_click=_select_lead, args=(prev_page,), key="lead_prev_page")
+    navc4.button("Page ▶", disabled=next_page is None, on_click=_select_lead, args=(next_page,), key="lead_next_page")
+    navc5.caption(f"Page {page + 1:,} of {pages:,} · leads {start + 1:,}–{end:,} of {n:,}")
+    navc6.selectbox("Page size", LEAD_PAGE_SIZES, index=LEAD_PAGE_SIZES.index(size) if size in LEAD_PAGE_SIZES else 1,
+                    key="lead_page_size", label_visibility="collapsed")
+    st.session_state["selected_index"] = pos
+    return sel_id
 
 
 def _open_link(url: str):
@@ -246,7 +358,8 @@ def detail_panel(user: Dict[str, Any], row: pd.Series, templates: Dict[str, str]
     st.write(f"Last Call: {row.get('last_call_dt','')}  |  Last Text: {row.get('last_text_dt','')}")
     st.write(f"Value: ${float(row.get('value_proxy_num',0)):.2f}")
     if 'EZ_Pay_Qualified' in row.index:
-        ez = str(row.get('EZ_Pay_Qualified','')).strip() or 'Unknown'
+        ez = row.get('EZ_Pay_Qualified', '')
+        ez = 'Unknown' if pd.isna(ez) else (str(ez).strip() or 'Unknown')
         st.write(f"EZ_Pay_Qualified: {ez}")
 
     phones: List[str] = row.get('all_phones', []) or []
@@ -258,7 +371,7 @@ def detail_panel(user: Dict[str, Any], row: pd.Series, templates: Dict[str, str]
         for i, p in enumerate(phones[:4]):
             with btn_cols[i % len(btn_cols)]:
                 if st.button(f"Call {p}", key=f"call_{row['EntityId']}_{i}"):
-                    actions.log_action(user['email'], row['EntityId'], 'call', {"phone": p})
+                    actions.log_action(user['email'], row['EntityId'], 'call', {"phone": p}, wait=False)
                     _open_link(justcall_client.dialer_url(p))
                     st.session_state["readiness_open_for"] = row['EntityId']
                     st.toast("Dialer opened")
@@ -281,7 +394,7 @@ def detail_panel(user: Dict[str, Any], row: pd.Series, templates: Dict[str, str]
     with c1:
         disabled = (not primary_phone) or (not rep_phone)
         if st.button("Pre-Call Msg", disabled=disabled):
-            actions.log_action(user['email'], row['EntityId'], 'pre_call_sms', {"phone": primary_phone})
+            actions.log_action(user['email'], row['EntityId'], 'pre_call_sms', {"phone": primary_phone}, wait=False)
             # Send via JustCall using rep number
             text = pre_sms or f"Hi, this is {rep_name} from Wolf Carports. About to call you from {rep_phone}."
             res = justcall_client.send_sms(primary_phone, text, rep_phone)
@@ -294,7 +407,7 @@ def detail_panel(user: Dict[str, Any], row: pd.Series, templates: Dict[str, str]
         if st.button("Send Finance Links via text", disabled=disabled):
             links = _finance_links()
             body = f"Hello {first_name}, here are Wolf Carports current finance options:\n" + "\n".join(links)
-            actions.log_action(user['email'], row['EntityId'], 'finance_sms', {"phone": primary_phone, "links": links})
+            actions.log_action(user['email'], row['EntityId'], 'finance_sms', {"phone": primary_phone, "links": links}, wait=False)
             res = justcall_client.send_sms(primary_phone, body, rep_phone)
             if res.get('success'):
                 st.toast("Finance links SMS sent")
@@ -308,7 +421,7 @@ def detail_panel(user: Dict[str, Any], row: pd.Series, templates: Dict[str, str]
     with c3:
         disabled = (not primary_phone) or (not rep_phone)
         if st.button("Post-Call Msg", disabled=disabled):
-            actions.log_action(user['email'], row['EntityId'], 'post_call_sms', {"phone": primary_phone})
+            actions.log_action(user['email'], row['EntityId'], 'post_call_sms', {"phone": primary_phone}, wait=False)
             text = post_sms or f"Thanks for your time. This is {rep_name} with Wolf Carports."
             res = justcall_client.send_sms(primary_phone, text, rep_phone)
             if res.get('success'):
@@ -336,7 +449,7 @@ def notes_panel_top(user: Dict[str, Any], entity_id: str):
         if coln2.button("Save note"):
             if new_draft and len(new_draft.strip()) >= 5:
                 fud = follow_up.isoformat() if follow_up else None
-                actions.append_note(user['email'], entity_id, new_draft.strip(), fud)
+                actions.append_note(user['email'], entity_id, new_draft.strip(), fud, wait=False)
                 st.session_state[draft_key] = ""
                 st.toast("Note saved")
                 st.rerun()
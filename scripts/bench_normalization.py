@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# Micro-benchmark: per-row re.split + normalize_us_phone vs. the batched, memoized normalization API
+# Usage: python scripts/bench_normalization.py [rows]
+
+from __future__ import annotations
+import os
+import re
+import sys
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, BASE_DIR)
+
+from lib import data_loader as dl  # noqa: E402
+from tests.synth import synth_frame  # noqa: E402
+
+PHONE_COLS = ["Leads_Cell_E164", "Customers_Cell", "Quotes_mobile_no", "Leads_All_NormPhones"]
+EMAIL_COLS = ["Leads_Email_1", "Quotes_email", "Customers_Email_2", "Invoices_Email"]
+
+
+def per_row(values, kind):
+    out = []
+    for v in values:
+        parts = []
+        for part in re.split(r"[;,\s]+", str(v)):
+            if kind == "phone":
+                p = dl.normalize_us_phone(part)
+            else:
+                part = part.strip().lower()
+                p = part if part and "@" in part else None
+            if p:
+                parts.append(p)
+        out.append(parts)
+    return out
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    df = synth_frame(rows)
+    for kind, cols, batch, memo in (("phone", PHONE_COLS, dl.split_phones, dl._PHONE_SPLIT_MEMO),
+                                    ("email", EMAIL_COLS, dl.split_emails, dl._EMAIL_SPLIT_MEMO)):
+        values = [v for c in cols for v in df[c].tolist()]
+        t0 = time.perf_counter()
+        old = per_row(values, kind)
+        t1 = time.perf_counter()
+        new = batch(values)
+        t2 = time.perf_counter()
+        assert old == new, f"{kind} mismatch"
+        print(f"{kind:>5} values={len(values)} per-row={t1 - t0:.3f}s batch={t2 - t1:.3f}s "
+              f"speedup={(t1 - t0) / max(t2 - t1, 1e-9):.1f}x memo={len(memo)}")
+
+
+if __name__ == "__main__":
+    main()
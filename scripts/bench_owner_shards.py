@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# Rep-scoped filter and facet-count latency as other reps' books grow: owner shards vs. whole-frame bitmaps
+# Usage: python scripts/bench_owner_shards.py [other_rows ...]
+
+from __future__ import annotations
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, BASE_DIR)
+
+from lib.filters import FilterIndex, apply_filters, facet_counts  # noqa: E402
+
+REP_ROWS = 5000
+POOL_ROWS = 5000
+REPEAT = 20
+
+
+def synth(other_rows: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = REP_ROWS + POOL_ROWS + other_rows
+    owners = np.array(["Rep A"] * REP_ROWS + ["Wolf Carports"] * POOL_ROWS
+                      + [f"Rep {i % 40}" for i in range(other_rows)], dtype=object)
+    rng.shuffle(owners)
+    return pd.DataFrame({
+        "EntityId": [f"E{i}" for i in range(n)],
+        "owner": owners,
+        "state": pd.Categorical(rng.choice(["TX", "NC", "VA", "GA", ""], n)),
+        "Leads_Stage": pd.Categorical(rng.choice(["New", "Quoted", "Cold Lead", ""], n)),
+        "Initial_Readiness_level": pd.Categorical(rng.choice(["Level 1", "Level 2", ""], n)),
+        "EZ_Pay_Qualified": pd.array(rng.random(n) < 0.2, dtype="boolean"),
+        "display_name": rng.choice(["Ana Wu", "John Smith", "Li Garcia", "Mary O'Neil"], n),
+        "value_proxy_num": rng.random(n) * 20000,
+    })
+
+
+USER = {"role": "wolf_rep", "owner_value": "Rep A"}
+SELECTION = (["Level 1"], [], [], ["TX"], {"EZ_Pay_Qualified": True}, "")
+
+
+def timed(df: pd.DataFrame, idx: FilterIndex) -> float:
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        apply_filters(df, USER, *SELECTION, sort_by="value_proxy_num", sort_asc=False, index=idx)
+    return (time.perf_counter() - t0) / REPEAT * 1e3
+
+
+def timed_facets(df: pd.DataFrame, idx: FilterIndex) -> float:
+    # Uncached (no version): what a rerun with a new selection pays
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        facet_counts(df, USER, *SELECTION, index=idx)
+    return (time.perf_counter() - t0) / REPEAT * 1e3
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [0, 100000, 400000, 1600000]
+    print(f"{'other rows':>10} {'total':>9} {'bitmaps ms':>11} {'shards ms':>10} {'facets ms':>10} {'sharded':>8}")
+    for other in sizes:
+        df = synth(other)
+        idx = FilterIndex(df)
+        sharded, sharded_facets = timed(df, idx), timed_facets(df, idx)
+        idx.shards = {}
+        bitmaps, bitmap_facets = timed(df, idx), timed_facets(df, idx)
+        print(f"{other:>10,} {len(df):>9,} {bitmaps:>11.2f} {sharded:>10.2f} {bitmap_facets:>10.2f} {sharded_facets:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
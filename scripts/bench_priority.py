@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# Priority sort: vectorized scoring once per dataset, then sorting only the filtered rows vs. the whole frame
+# Usage: python scripts/bench_priority.py [rows] [filtered_rows]
+
+from __future__ import annotations
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, BASE_DIR)
+
+from lib.priority import PriorityScores, compute_scores  # noqa: E402
+
+REPEAT = 20
+
+
+def synth(n: int, seed: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    now = pd.Timestamp("2024-06-01")
+    calls = now - pd.to_timedelta(rng.integers(0, 120, n), unit="D")
+    return pd.DataFrame({
+        "Initial_Readiness_level": pd.Categorical(rng.choice(["Level 1", "Level 2", "Level 3", ""], n)),
+        "Readiness_Score": np.where(rng.random(n) < 0.3, rng.integers(0, 11, n).astype(float), np.nan),
+        "value_proxy_num": np.where(rng.random(n) < 0.8, rng.gamma(2.0, 4000.0, n), np.nan),
+        "last_call_dt": pd.Series(calls).where(rng.random(n) < 0.7),
+        "last_text_dt": pd.Series(calls + pd.to_timedelta(rng.integers(0, 10, n), unit="D")).where(rng.random(n) < 0.5),
+        "EZ_Pay_Qualified": pd.array(rng.random(n) < 0.2, dtype="boolean"),
+        "ProximityCheck": pd.array(rng.random(n) < 0.4, dtype="boolean"),
+    })
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    df = synth(n)
+    t0 = time.perf_counter()
+    ps = PriorityScores(compute_scores(df, now=pd.Timestamp("2024-06-01")), ())
+    t1 = time.perf_counter()
+    # A rep-scoped selection: m rows spread over the frame
+    rows = np.sort(np.random.default_rng(1).choice(n, m, replace=False))
+    for _ in range(REPEAT):
+        got = ps.ranked(rows)
+    t2 = time.perf_counter()
+    for _ in range(REPEAT):
+        perm = np.lexsort((np.arange(n), -ps.scores))
+        keep = np.zeros(n, dtype=bool)
+        keep[rows] = True
+        full = perm[keep[perm]]
+    t3 = time.perf_counter()
+    assert np.array_equal(got, full), "order mismatch"
+    print(f"rows={n:,} filtered={m:,} score={(t1 - t0) * 1e3:.1f}ms "
+          f"sort filtered={(t2 - t1) / REPEAT * 1e3:.2f}ms sort whole frame + mask={(t3 - t2) / REPEAT * 1e3:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# Main-page daily metrics: scanning the day's actions/notes in Python vs. reading the rollup tables
+# Usage: python scripts/bench_rollups.py [actions_per_day ...]
+
+from __future__ import annotations
+import os
+import random
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, BASE_DIR)
+
+from lib import actions  # noqa: E402
+
+DAY = "2024-06-03"
+REPEAT = 20
+
+
+def scan_metrics(day: str):
+    # What page_main used to do
+    start = f"{day}T00:00:00+00:00"; end = f"{day}T23:59:59+00:00"
+    acts = actions.get_actions_by_range(start, end)
+    notes = actions.get_notes_by_range(start, end)
+    return {
+        "calls": sum(1 for a in acts if a["action_type"] == "call"),
+        "texts": sum(1 for a in acts if a["action_type"] in ("pre_call_sms", "post_call_sms")),
+        "followups": sum(1 for n in notes if (n["follow_up_date"] or "").startswith(day)),
+    }
+
+
+def fill(conn, n: int, rng: random.Random) -> None:
+    types = ["call", "call", "pre_call_sms", "post_call_sms", "finance_sms"]
+    with conn:
+        for i in range(n):
+            ts = f"{DAY}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00+00:00"
+            user = f"rep{rng.randint(0, 24)}@x"
+            actions._insert_action(conn, ts, user, f"E{i % 5000}", rng.choice(types), "{}")
+            if i % 4 == 0:
+                actions._insert_note(conn, ts, user, f"E{i % 5000}", "note", rng.choice([None, DAY, "2024-06-10"]))
+
+
+def timed(fn) -> tuple:
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        out = fn(DAY)
+    return (time.perf_counter() - t0) / REPEAT * 1e3, out
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        actions.DB_PATH = os.path.join(tmp, "state.db")
+        conn = actions._conn()
+        total = 0
+        print(f"{'actions/day':>11} {'scan ms':>8} {'rollup ms':>10}")
+        for n in sizes:
+            fill(conn, n - total, rng)
+            total = n
+            scan, a = timed(scan_metrics)
+            rollup, b = timed(actions.daily_metrics)
+            assert a == b, (a, b)
+            print(f"{n:>11,} {scan:>8.2f} {rollup:>10.3f}")
+        actions.close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# Workspace text search: inverted-index lookup vs. the substring scan, for rare and very common terms
+# Usage: python scripts/bench_search.py [rows]
+
+from __future__ import annotations
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, BASE_DIR)
+
+from lib.search import SearchIndex, substring_rows  # noqa: E402
+
+QUERIES = ["1", "a", "mail", "33", "john", "smith j", "+13365550123", "zzz"]
+REPEAT = 5
+
+
+def synth(n: int, seed: int = 9) -> pd.DataFrame:
+    # Unique emails and phones per lead, so the vocabulary grows with the rows like a real export
+    rng = np.random.default_rng(seed)
+    first = rng.choice(["John", "Mary", "Ana", "Li", "Jose", "Sam", "Kim", "Lee"], n)
+    last = rng.choice(["Smith", "Garcia", "Wu", "Oneil", "Brown", "Jones"], n)
+    phones = rng.integers(2000000000, 9999999999, (n, 2))
+    return pd.DataFrame({
+        "display_name": [f"{a} {b}" for a, b in zip(first, last)],
+        "primary_email": [f"{a.lower()}.{b.lower()}{i}@mail{i % 50}.com" for i, (a, b) in enumerate(zip(first, last))],
+        "city": rng.choice(["Austin", "Raleigh", "Dallas", ""], n),
+        "state": rng.choice(["TX", "NC", "VA", "GA"], n),
+        "all_phones": [[f"+1{p}" for p in ps[:1 + i % 2]] for i, ps in enumerate(phones)],
+    })
+
+
+def timed(fn) -> float:
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - t0) / REPEAT * 1e3
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    df = synth(n)
+    t0 = time.perf_counter()
+    idx = SearchIndex(df)
+    print(f"rows={n:,} vocab={len(idx.vocab):,} build={time.perf_counter() - t0:.2f}s")
+    print(f"{'query':>14} {'rows':>8} {'index ms':>9} {'scan ms':>8}")
+    for q in QUERIES:
+        scan = timed(lambda: substring_rows(df, q))
+
+        def cold():
+            idx._terms.clear()
+            return idx.match(q, df)
+        got = cold()
+        assert np.array_equal(got, substring_rows(df, q)), q
+        print(f"{q:>14} {len(got):>8,} {timed(cold):>9.1f} {scan:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# Per-call overhead of lib/actions: open + init_db + close per call vs. the pooled per-thread connection
+# Usage: python scripts/bench_sqlite_pool.py [calls]
+
+from __future__ import annotations
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, BASE_DIR)
+
+from lib import actions  # noqa: E402
+
+NOTES = 20
+
+
+def unpooled_get_notes(entity_id: str):
+    # What every public function used to do
+    conn = actions.get_conn(actions.DB_PATH)
+    actions.init_db(conn)
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM notes WHERE entity_id=? ORDER BY ts DESC", (entity_id,))
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+
+def pooled_get_notes(entity_id: str):
+    # Pooled connection without the entity activity cache
+    return actions._query("SELECT * FROM notes WHERE entity_id=? ORDER BY ts DESC", (entity_id,))
+
+
+def timed(fn, calls: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(calls):
+        fn(f"E{i % 50}")
+    return (time.perf_counter() - t0) / calls * 1e6
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        actions.DB_PATH = os.path.join(tmp, "state.db")
+        for i in range(NOTES * 50):
+            actions.append_note("rep@x", f"E{i % 50}", f"note {i}")
+        old = timed(unpooled_get_notes, calls)
+        new = timed(pooled_get_notes, calls)
+        cached = timed(actions.get_notes, calls)
+        assert [tuple(r) for r in unpooled_get_notes("E7")] == [tuple(r) for r in pooled_get_notes("E7")]
+        t0 = time.perf_counter()
+        for i in range(calls // 4):
+            actions.log_action("rep@x", f"E{i % 50}", "call", {"phone": "+13365551234"})
+        write = (time.perf_counter() - t0) / (calls // 4) * 1e6
+        actions.close_connections()
+    print(f"get_notes x{calls}: per-call connection={old:.0f}us pooled={new:.0f}us speedup={old / new:.1f}x "
+          f"activity cache={cached:.1f}us")
+    print(f"log_action pooled={write:.0f}us/call (includes the commit)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# Peak RSS of a cold dataset build, whole-file vs. streaming ingest, as the export grows
+# Usage: python scripts/bench_streaming_ingest.py [rows ...]
+
+from __future__ import annotations
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, BASE_DIR)
+
+WIDE_COLUMNS = 40
+
+
+def write_export(path: str, rows: int) -> None:
+    from tests.synth import synth_frame
+    block = 20000
+    for start in range(0, rows, block):
+        df = synth_frame(min(block, rows - start), seed=start)
+        df["EntityId"] = [f"E{start + i}" for i in range(len(df))]
+        for i in range(WIDE_COLUMNS):
+            df[f"Orders_Detail_{i}"] = "detail text that only the lead detail panel reads"
+        df.to_csv(path, mode="a", header=(start == 0), index=False)
+
+
+def child(path: str, mode: str, budget_mb: str) -> None:
+    warnings.filterwarnings("ignore")
+    from lib import data_loader as dl
+    dl.STREAM_THRESHOLD_MB = 0 if mode == "stream" else 1 << 20
+    dl.STREAM_MEMORY_BUDGET_MB = float(budget_mb)
+    t0 = time.perf_counter()
+    ds = dl._build_dataset(path, os.path.getmtime(path))
+    elapsed = time.perf_counter() - t0
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{len(ds.df)} {elapsed:.2f} {peak_mb:.0f}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(*sys.argv[2:5])
+        return
+    sizes = [int(a) for a in sys.argv[1:]] or [50000, 100000, 200000, 400000]
+    budget = "64"
+    print(f"{'rows':>8} {'csv MB':>7} {'mode':>7} {'secs':>6} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            path = os.path.join(tmp, f"FinalDataForDashboard_20250101_{rows:06d}.csv")
+            write_export(path, rows)
+            csv_mb = os.path.getsize(path) / 2**20
+            for mode in ("whole", "stream"):
+                for f in os.listdir(tmp):
+                    if f.endswith(".arrow"):
+                        os.remove(os.path.join(tmp, f))
+                out = subprocess.run([sys.executable, __file__, "--child", path, mode, budget],
+                                     capture_output=True, text=True, cwd=tmp, check=True).stdout.split()
+                print(f"{rows:>8} {csv_mb:>7.0f} {mode:>7} {float(out[1]):>6.2f} {float(out[2]):>12.0f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# Synthetic export rows and the original per-row derivation, shared by the tests and scripts/bench_*
+
+from __future__ import annotations
+import random
+import re
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+from lib.data_loader import compact_dtypes, derive_columns, normalize_us_phone
+
+FIRST = ["John", "Mary", "", "  Ana", "José", "Li", ""]
+LAST = ["Smith", "", "O'Neil ", "García", "Wu"]
+PHONES = ["(336) 555-1234", "3365551234", "+13365551234", "1-919-555-0000", "555-12", "", "n/a",
+          "336.555.9999; 9195550000", "+1 704 555 1212, 7045551212"]
+EMAILS = ["a@x.com", "B@X.COM", "", "not-an-email", "c@y.org; d@z.net", " e@w.io ", "a@x.com,f@q.com"]
+STATES = ["TX", "NC", "", "VA", "GA"]
+DATES = ["2024-05-01", "", "2024-13-40", "2023-12-31 10:00:00"]
+MONEY = ["$12,500.00", "8000", "", "abc", "1,200,300", "$ 99.5"]
+LEAD_STAGES = ["New", "Quoted", "Cold Lead", "Payment confirmed", ""]
+CUSTOMER_STAGES = ["Active", "Direct purchase", ""]
+LEVELS = ["Level 1", "Level 2", "Level 3", ""]
+FLAGS = ["EZ_Pay_Qualified", "ProximityCheck", "Leads_NotCalledIn30Days", "Leads_Called", "Customers_Called",
+         "Leads_Spoken", "Customers_Spoken"]
+
+
+def synth_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    rnd = random.Random(seed)
+    pick = rnd.choice
+    data = {
+        "EntityId": [f"E{i}" for i in range(rows)],
+        "Leads_First_Name": [pick(FIRST) for _ in range(rows)],
+        "Leads_Last_Name": [pick(LAST) for _ in range(rows)],
+        "Customers_First_Name": [pick(FIRST) for _ in range(rows)],
+        "Customers_Last_Name": [pick(LAST) for _ in range(rows)],
+        "Customers_Customer_name": [pick(["", "ACME LLC"]) for _ in range(rows)],
+        "Leads_NormName": [pick(["", "smith john"]) for _ in range(rows)],
+        "Leads_Owner": [pick(["Wolf Carports", "Rep A", "Rep B"]) for _ in range(rows)],
+        "Leads_City": [pick(["Austin", "", "Raleigh"]) for _ in range(rows)],
+        "Customers_City": [pick(["Dallas", ""]) for _ in range(rows)],
+        "Leads_State": [pick(STATES) for _ in range(rows)],
+        "Customers_State": [pick(STATES) for _ in range(rows)],
+        "Leads_Zip_code": [pick(["", "27601"]) for _ in range(rows)],
+        "Leads_LastCallDate": [pick(DATES) for _ in range(rows)],
+        "Customers_Text_LastTextDate": [pick(DATES) for _ in range(rows)],
+        "Last_quote_grandtotal": [pick(MONEY) for _ in range(rows)],
+    }
+    for col in ["Leads_Cell_E164", "Customers_Cell", "Quotes_mobile_no", "Leads_All_NormPhones"]:
+        data[col] = [pick(PHONES) for _ in range(rows)]
+    for col in ["Leads_Email_1", "Quotes_email", "Customers_Email_2", "Invoices_Email"]:
+        data[col] = [pick(EMAILS) for _ in range(rows)]
+    return pd.DataFrame(data)
+
+
+def lead_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    # synth_frame plus the stage, readiness and flag columns the workspace filters on, derived and
+    # compacted like a loaded dataset
+    rnd = random.Random(seed + 1)
+    df = synth_frame(rows, seed)
+    df["Leads_Stage"] = [rnd.choice(LEAD_STAGES) for _ in range(rows)]
+    df["Customers_Stage"] = [rnd.choice(CUSTOMER_STAGES) for _ in range(rows)]
+    df["Initial_Readiness_level"] = [rnd.choice(LEVELS) for _ in range(rows)]
+    for col in FLAGS:
+        df[col] = [rnd.choice(["true", "false", "false", ""]) for _ in range(rows)]
+    return compact_dtypes(derive_columns(df))
+
+
+# Reference: the original per-row derivation from lib/data_loader.load_csv
+def legacy_derive(df: pd.DataFrame) -> pd.DataFrame:
+    def display_name(row):
+        fn = row.get("Leads_First_Name") or row.get("Customers_First_Name") or ""
+        ln = row.get("Leads_Last_Name") or row.get("Customers_Last_Name") or ""
+        nm = (fn + " " + ln).strip()
+        return nm or row.get("Customers_Customer_name") or row.get("Orders_Customer_name") or row.get("Leads_NormName") or row.get("Customers_NormName") or "Unknown"
+
+    def collect_phones(row) -> Tuple[Optional[str], List[str]]:
+        candidates: List[str] = []
+        for col in ["Leads_Cell_E164", "Customers_Cell_E164", "Leads_Cell", "Customers_Cell", "Quotes_mobile_no", "Orders_Cell", "Leads_All_NormPhones", "Customers_All_NormPhones"]:
+            val = row.get(col)
+            if not val:
+                continue
+            for part in re.split(r"[;,\s]+", str(val)):
+                p = normalize_us_phone(part)
+                if p:
+                    candidates.append(p)
+        seen = set()
+        uniq = []
+        for p in candidates:
+            if p not in seen:
+                seen.add(p)
+                uniq.append(p)
+        return (uniq[0] if uniq else None), uniq
+
+    def collect_emails(row) -> Tuple[Optional[str], List[str]]:
+        ems: List[str] = []
+        for col in ["Leads_Email_1", "Leads_Email_2", "Quotes_email", "Quotes_email_2",
+                    "Customers_Email_1", "Customers_Email_2", "Orders_Customer_Email", "Invoices_Email"]:
+            v = row.get(col)
+            if not v:
+                continue
+            for part in re.split(r"[;,\s]+", str(v)):
+                part = part.strip().lower()
+                if part and "@" in part:
+                    ems.append(part)
+        seen = set(); uniq = []
+        for e in ems:
+            if e not in seen:
+                seen.add(e); uniq.append(e)
+        return (uniq[0] if uniq else None), uniq
+
+    disp, prim_phone, all_phones, prim_email, all_emails = [], [], [], [], []
+    city, state, zipcode, last_call, last_text = [], [], [], [], []
+    for _, row in df.iterrows():
+        disp.append(display_name(row))
+        p0, ps = collect_phones(row)
+        prim_phone.append(p0); all_phones.append(ps)
+        e0, es = collect_emails(row)
+        prim_email.append(e0); all_emails.append(es)
+        city.append(row.get("Leads_City") or row.get("Customers_City") or "")
+        state.append(row.get("Leads_State") or row.get("Customers_State") or "")
+        zipcode.append(row.get("Leads_Zip_code") or row.get("Customers_Zip_code") or "")
+        last_call.append(row.get("Leads_LastCallDate") or row.get("Customers_LastCallDate") or "")
+        last_text.append(row.get("Leads_Text_LastTextDate") or row.get("Customers_Text_LastTextDate") or "")
+    df["display_name"] = disp
+    df["primary_phone"] = prim_phone
+    df["all_phones"] = all_phones
+    df["primary_email"] = prim_email
+    df["all_emails"] = all_emails
+    df["city"] = city
+    df["state"] = state
+    df["zip"] = zipcode
+
+    def parse_money(s: str) -> float:
+        try:
+            s = str(s).split(",")[0].replace("$", "").replace(",", "").strip()
+            return float(s) if s else 0.0
+        except Exception:
+            return 0.0
+
+    if "Last_quote_grandtotal" in df.columns:
+        df["value_proxy_num"] = df["Last_quote_grandtotal"].apply(parse_money)
+    elif "Quotes_grand_total" in df.columns:
+        df["value_proxy_num"] = df["Quotes_grand_total"].apply(parse_money)
+    else:
+        df["value_proxy_num"] = 0.0
+    df["last_call_dt"] = pd.to_datetime(last_call, errors="coerce")
+    df["last_text_dt"] = pd.to_datetime(last_text, errors="coerce")
+    df["owner"] = df.get("Leads_Owner", pd.Series([""]*len(df)))
+    return df
+
@@ -0,0 +1,152 @@
+import random
+import sqlite3
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from lib import actions
+from lib.data_loader import LeadDataset
+
+
+@pytest.fixture(params=[False, True], ids=["sync", "group-commit"])
+def state_db(tmp_path, monkeypatch, request):
+    monkeypatch.setattr(actions, "DB_PATH", str(tmp_path / "state.db"))
+    actions._ACTIVITY.clear()
+    if request.param:
+        actions.start_writer()
+    yield request.param
+    actions.stop_writer()
+    actions.close_connections()
+    actions._ACTIVITY.clear()
+
+
+def _direct(kind, entity_id):
+    sql = actions._ACTIVITY_SQL[kind].format("?")
+    return [tuple(r) for r in actions._query(sql, (entity_id,))]
+
+
+def _cached(kind, entity_id):
+    fn = {"notes": actions.get_notes, "actions": actions.get_actions}[kind]
+    return [tuple(r) for r in fn(entity_id)]
+
+
+def test_writes_invalidate_cached_activity(state_db):
+    wait = not state_db
+    actions.append_note("rep@x", "E1", "first")
+    actions.log_action("rep@x", "E1", "call", {"n": 1})
+    actions.prefetch_activity(["E1", "E2"])
+    hits = actions.activity_cache_stats()["hits"]
+    assert _cached("notes", "E1") == _direct("notes", "E1")
+    assert actions.activity_cache_stats()["hits"] == hits + 1
+    for i in range(3):
+        actions.append_note("rep@x", "E1", f"note {i}", wait=wait)
+        actions.log_action("rep@x", "E1", "call", {"n": i}, wait=wait)
+        actions.set_readiness("E1", {"q": i}, float(i), f"Level {i}", wait=wait)
+        assert _cached("notes", "E1") == _direct("notes", "E1")
+        assert _cached("actions", "E1") == _direct("actions", "E1")
+        assert actions.get_readiness("E1")["level"] == f"Level {i}"
+    assert _cached("notes", "E2") == [] == _direct("notes", "E2")
+
+
+def test_write_during_fetch_is_not_cached(state_db, monkeypatch):
+    actions.append_note("rep@x", "E1", "first")
+    query = actions._query
+
+    def racing_query(sql, params=()):
+        rows = query(sql, params)
+        # Another session writes after the read, before the fetch stores its rows
+        monkeypatch.setattr(actions, "_query", query)
+        actions.append_note("rep@x", "E1", "second")
+        return rows
+
+    monkeypatch.setattr(actions, "_query", racing_query)
+    assert len(actions.get_notes("E1")) == 1
+    assert "E1" not in actions._ACTIVITY
+    assert [r["note_text"] for r in actions.get_notes("E1")] == ["second", "first"]
+
+
+def test_overlay_applies_saves_committed_out_of_ts_order(state_db, monkeypatch):
+    df = pd.DataFrame({"EntityId": ["E1", "E2"], "Initial_Readiness_level": ["Level 1", "Level 1"],
+                       "Readiness_Score": [float("nan")] * 2})
+    ds = LeadDataset(df=df, path="export.csv", mtime=0.0)
+    ds.refresh_overlay()
+    # E2's save was stamped first but commits after E1's has been applied
+    monkeypatch.setattr(actions, "_now_iso", lambda: "2024-06-03T12:00:01+00:00")
+    actions.set_readiness("E1", {}, 3.0, "Level 3")
+    ds.refresh_overlay()
+    monkeypatch.setattr(actions, "_now_iso", lambda: "2024-06-03T12:00:00+00:00")
+    actions.set_readiness("E2", {}, 4.0, "Level 4", wait=not state_db)
+    ds.refresh_overlay()
+    assert ds.df["Initial_Readiness_level"].tolist() == ["Level 3", "Level 4"]
+    assert ds.df["Readiness_Score"].tolist() == [3.0, 4.0]
+
+
+DAYS = ["2024-06-02", "2024-06-03", "2024-06-04"]
+REPS = ["rep0@x", "rep1@x", "rep2@x"]
+ACTION_TYPES = ["call", "call", "pre_call_sms", "post_call_sms", "finance_sms"]
+
+
+def _scan_metrics(day, user_id=None):
+    # The old range-scan counts the rollups replaced
+    start, end = f"{day}T00:00:00+00:00", f"{day}T23:59:59+00:00"
+    acts = [a for a in actions.get_actions_by_range(start, end) if not user_id or a["user_id"] == user_id]
+    notes = [n for n in actions.get_notes_by_range(start, end) if not user_id or n["user_id"] == user_id]
+    return {
+        "calls": sum(1 for a in acts if a["action_type"] == "call"),
+        "texts": sum(1 for a in acts if a["action_type"] in actions.TEXT_ACTIONS),
+        "followups": sum(1 for n in notes if (n["follow_up_date"] or "").startswith(day)),
+    }
+
+
+def _scan_by_rep(start_day, end_day):
+    acts = actions.get_actions_by_range(f"{start_day}T00:00:00+00:00", f"{end_day}T23:59:59+00:00")
+    return sorted(Counter((a["user_id"], a["action_type"]) for a in acts).items())
+
+
+def test_rollups_match_range_scans(state_db, tmp_path, monkeypatch):
+    rnd = random.Random(4)
+
+    def stamp():
+        return f"{rnd.choice(DAYS)}T{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}:00+00:00"
+
+    # A database from before versioning: v1 tables with history, user_version 0
+    path = str(tmp_path / "baseline.db")
+    conn = sqlite3.connect(path)
+    for stmt in actions.SCHEMA:
+        conn.execute(stmt)
+    for i in range(200):
+        ts, user = stamp(), rnd.choice(REPS)
+        actions._insert_action(conn, ts, user, f"E{i % 40}", rnd.choice(ACTION_TYPES), "{}")
+        if i % 3 == 0:
+            actions._insert_note(conn, ts, user, f"E{i % 40}", "note", rnd.choice([None, ts[:10], DAYS[0] + "T09:00"]))
+    conn.commit()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+    conn.close()
+
+    actions.stop_writer()
+    monkeypatch.setattr(actions, "DB_PATH", path)
+    if state_db:
+        actions.start_writer()
+    assert actions.schema_version() == actions.SCHEMA_VERSION
+    backfilled = {day: _scan_metrics(day) for day in DAYS}
+    assert all(actions.daily_metrics(day) == backfilled[day] for day in DAYS)
+
+    futures = []
+    for i in range(100):
+        ts, user = stamp(), rnd.choice(REPS)
+        monkeypatch.setattr(actions, "_now_iso", lambda: ts)
+        futures.append(actions.log_action(user, f"E{i % 40}", rnd.choice(ACTION_TYPES), wait=False))
+        if i % 2 == 0:
+            futures.append(actions.append_note(user, f"E{i % 40}", "note", rnd.choice([None, ts[:10]]), wait=False))
+    for fut in futures:
+        fut.result()
+
+    for day in DAYS:
+        assert actions.daily_metrics(day) == _scan_metrics(day), day
+        for user in REPS + ["nobody@x"]:
+            assert actions.daily_metrics(day, user) == _scan_metrics(day, user), (day, user)
+    assert any(actions.daily_metrics(day) != backfilled[day] for day in DAYS)
+    for start, end in [(DAYS[0], DAYS[-1]), (DAYS[1], DAYS[1]), ("2024-07-01", "2024-07-02")]:
+        got = [((r["user_id"], r["action_type"]), r["n"]) for r in actions.activity_by_rep(start, end)]
+        assert got == _scan_by_rep(start, end), (start, end)
@@ -0,0 +1,91 @@
+import os
+import weakref
+
+import pandas as pd
+import pytest
+
+from lib import actions
+from lib import data_loader as dl
+from tests.synth import legacy_derive, synth_frame
+
+ROWS = 500
+
+
+@pytest.fixture
+def export_csv(tmp_path):
+    path = tmp_path / "FinalDataForDashboard_20250101_000000.csv"
+    synth_frame(ROWS).to_csv(path, index=False)
+    return str(path)
+
+
+def test_columnar_derivation_matches_per_row(export_csv):
+    raw = pd.read_csv(export_csv, dtype=str, keep_default_na=False)
+    pd.testing.assert_frame_equal(legacy_derive(raw.copy()), dl.derive_columns(raw.copy()))
+
+
+def test_split_results_are_not_shared():
+    first = dl.split_phones(["3365551234, 9195550000"])
+    first[0].append("mutated")
+    assert dl.split_phones(["3365551234, 9195550000"]) == [["+13365551234", "+19195550000"]]
+
+
+def test_streamed_build_matches_whole_file(export_csv, monkeypatch):
+    raw = pd.read_csv(export_csv, dtype=str, keep_default_na=False)
+    # A flag column that reads as bool in the first chunk and as text later
+    raw["EZ_Pay_Qualified"] = ["true"] * (ROWS // 2) + ["maybe"] * (ROWS - ROWS // 2)
+    raw.to_csv(export_csv, index=False)
+    whole, _ = dl._ingest_csv(export_csv)
+    before = dl._frame_bytes(whole)
+    whole = dl._project(dl.compact_dtypes(whole))
+    monkeypatch.setattr(dl, "_stream_chunk_rows", lambda path, budget: 100)
+    streamed, stats, _ = dl._ingest_streaming(export_csv, 0.0)
+    assert stats["stream"]["chunks"] == ROWS // 100
+    assert stats["memory_before"] == pytest.approx(before, rel=0.01)
+    assert stats["memory_before"] > stats["memory_after"]
+    pd.testing.assert_frame_equal(whole, streamed, check_categorical=False)
+
+
+def test_rebuilt_dataset_gets_a_new_version(export_csv):
+    df = dl._project(dl.compact_dtypes(dl._ingest_csv(export_csv)[0]))
+    first = dl.LeadDataset(df=df, path=export_csv, mtime=1700000000.25)
+    again = dl.LeadDataset(df=df, path=export_csv, mtime=1700000000.25)
+    touched = dl.LeadDataset(df=df, path=export_csv, mtime=1700000000.4)
+    assert len({first.version, again.version, touched.version}) == 3
+    assert "1700000000.25" in first.version
+
+
+@pytest.mark.parametrize("date_format", [None, "%m/%d/%Y"], ids=["reordered", "new-format"])
+def test_incremental_build_matches_full_derivation(export_csv, tmp_path, monkeypatch, date_format):
+    a, stats = dl._ingest_csv(export_csv)
+    prev = dl.LeadDataset(df=dl._project(dl.compact_dtypes(a)), path=export_csv, mtime=0.0, stats=stats)
+    monkeypatch.setattr(dl, "_LAST_BUILT", weakref.ref(prev))
+    raw = pd.read_csv(export_csv, dtype=str, keep_default_na=False)
+    raw.loc[:49, "Leads_First_Name"] = "Changed"
+    raw = pd.concat([raw.iloc[60:], raw.iloc[:50]], ignore_index=True)
+    if date_format:
+        # The first dated row decides the inferred format for the whole file
+        for col in ["Leads_LastCallDate", "Customers_Text_LastTextDate"]:
+            raw.loc[0, col] = pd.Timestamp("2024-06-02").strftime(date_format)
+    path = tmp_path / "FinalDataForDashboard_20250102_000000.csv"
+    raw.to_csv(path, index=False)
+    got, stats = dl._ingest_csv(str(path))
+    changed = 50 + bool(date_format)
+    assert stats["ingest"] == {"added": 0, "changed": changed, "removed": 10, "reused": len(raw) - changed}
+    expected = dl.derive_columns(pd.read_csv(path, dtype=str, keep_default_na=False))
+    pd.testing.assert_frame_equal(got.drop(columns=dl.FINGERPRINT_COL), expected, check_dtype=False)
+
+
+def test_build_stats_survive_a_restart(export_csv, tmp_path, monkeypatch):
+    monkeypatch.setattr(actions, "DB_PATH", str(tmp_path / "state.db"))
+    mtime = os.path.getmtime(export_csv)
+    dl._build_dataset.clear()
+    built = dl._build_dataset(export_csv, mtime)
+    assert built.detail_source and built.stats["memory_resident"] < built.stats["memory_after"]
+    # A new process loads the snapshot instead of parsing the export
+    dl._build_dataset.clear()
+    monkeypatch.setattr(dl, "_ingest_csv", None)
+    loaded = dl._build_dataset(export_csv, mtime)
+    for key in ("memory_before", "memory_after", "memory_resident", "ingest"):
+        assert loaded.stats[key] == built.stats[key], key
+    dl._build_dataset.clear()
+    actions.close_connections()
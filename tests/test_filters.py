@@ -0,0 +1,182 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib import filters
+from lib.priority import PRIORITY_SORT, PriorityScores, compute_scores
+from lib.search import FuzzyIndex, SearchIndex
+from tests.synth import lead_frame
+
+ROWS = 800
+SORTS = ["display_name", "state", "Leads_Stage", "Initial_Readiness_level", "last_call_dt", "value_proxy_num"]
+
+
+def reference_filter(df, user, readiness, lead_stage, customer_stage, states, engagement, text_query,
+                     owners_override=None, sort_by="display_name", sort_asc=True):
+    # The original pandas implementation: one boolean mask per predicate, row-wise text search
+    f = df
+    role = (user or {}).get("role", "wolf_rep")
+    owner_val = (user or {}).get("owner_value", "")
+    if role == "manager" and owners_override:
+        f = f[f["owner"].isin(owners_override)]
+    else:
+        f = f[f["owner"].isin([owner_val, "Wolf Carports"] if owner_val else ["Wolf Carports"])]
+    f = f[~f["Leads_Stage"].isin(filters.EXCLUDED_STAGES) & ~f["Customers_Stage"].isin(filters.EXCLUDED_STAGES)]
+    if readiness:
+        f = f[f["Initial_Readiness_level"].isin(readiness)]
+    if lead_stage:
+        f = f[f["Leads_Stage"].isin(lead_stage)]
+    if customer_stage:
+        f = f[f["Customers_Stage"].isin(customer_stage)]
+    if states:
+        f = f[f["state"].isin(states)]
+    for col in filters.CHECK_COLUMNS:
+        if col in f.columns and engagement.get(col, False):
+            f = f[f[col].astype(str).str.lower() == "true"]
+    cols = [c for c in filters.INTERACTION_COLUMNS.get(engagement.get("interaction") or "", []) if c in f.columns]
+    if cols:
+        f = f[pd.concat([f[c].astype(str).str.lower() == "true" for c in cols], axis=1).any(axis=1)]
+    q = (text_query or "").strip().lower()
+    if q:
+        def row_match(row) -> bool:
+            hay = [str(row.get(c, "")) for c in ("display_name", "primary_email", "city", "state")]
+            hay += [str(p) for p in row.get("all_phones", []) or []]
+            return q in " ".join(hay).lower()
+        f = f[f.apply(row_match, axis=1)] if len(f) else f
+    return f.sort_values(by=sort_by, ascending=sort_asc, na_position="last")
+
+
+def random_cases(n, seed=3):
+    rnd = random.Random(seed)
+    for _ in range(n):
+        engagement = {c: rnd.random() < 0.1 for c in ["EZ_Pay_Qualified", "ProximityCheck", "Leads_NotCalledIn30Days"]}
+        engagement["interaction"] = rnd.choice(["", "", "Called", "Spoken"])
+        yield (
+            rnd.choice([{"role": "wolf_rep", "owner_value": "Rep A"}, {"role": "manager"}, {"role": "wolf_rep", "owner_value": ""}]),
+            rnd.choice([[], [], ["Level 1"], ["Level 2", "Level 3"]]),
+            rnd.choice([[], [], ["New"], ["New", "Quoted"]]),
+            rnd.choice([[], [], ["Active"]]),
+            rnd.choice([[], [], ["TX"], ["NC", "VA"]]),
+            engagement,
+            rnd.choice(["", "", "john", "336", "a@x", "smith j", "none", "aus", "zzz"]),
+            rnd.choice([None, ["Rep B"], ["Rep A", "Wolf Carports"]]),
+            rnd.choice(SORTS),
+            rnd.random() < 0.5,
+        )
+
+
+@pytest.fixture(scope="module")
+def df():
+    return lead_frame(ROWS)
+
+
+def _sort_values(frame, col):
+    s = frame[col]
+    return s.astype(object).where(s.notna(), None).astype(str).tolist()
+
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_filters_match_reference(df, indexed):
+    kw = {}
+    if indexed:
+        kw = {"index": filters.FilterIndex(df, "v1"), "search": SearchIndex(df), "version": "test-v1"}
+    for args in random_cases(60):
+        expected = reference_filter(df, *args)
+        got, _ = filters.apply_filters(df, *args, **kw)
+        assert sorted(got["EntityId"]) == sorted(expected["EntityId"]), args
+        # Ties may come back in any order; the sort key sequence must agree
+        assert _sort_values(got, args[8]) == _sort_values(expected, args[8]), args
+
+
+def test_cached_result_matches_fresh(df):
+    args = next(random_cases(1, seed=11))
+    index = filters.FilterIndex(df, "v1")
+    first, _ = filters.apply_filters(df, *args, index=index, version="test-cache")
+    hits = filters.result_cache_stats()["hits"]
+    again, _ = filters.apply_filters(df, *args, index=index, version="test-cache")
+    assert filters.result_cache_stats()["hits"] == hits + 1
+    pd.testing.assert_frame_equal(first, again)
+
+
+def reference_facets(df, user, readiness, lead_stage, customer_stage, states, engagement, text_query, owners_override,
+                     run=reference_filter):
+    # Each dimension counted with its own selection dropped; a manager's owner scope is the Owners facet
+    args = [user, readiness, lead_stage, customer_stage, states, engagement, text_query, owners_override]
+    out = {}
+    for dim, col in filters.FACET_COLUMNS.items():
+        a = list(args)
+        if dim == "owners":
+            if user.get("role") == "manager":
+                a[7] = sorted(df["owner"].dropna().unique())
+        else:
+            a[["readiness", "lead_stage", "customer_stage", "states"].index(dim) + 1] = []
+        counts = run(df, *a)[col].astype(str).value_counts()
+        out[dim] = {k: v for k, v in counts.items() if v}
+    return out
+
+
+@pytest.mark.parametrize("indexed", [False, True])
+def test_facet_counts_match_reference(df, indexed):
+    kw = {}
+    if indexed:
+        kw = {"index": filters.FilterIndex(df, "v1"), "search": SearchIndex(df), "version": "test-facets"}
+    for args in random_cases(40, seed=5):
+        args = args[:8]
+        for _ in range(2 if indexed else 1):
+            got = filters.facet_counts(df, *args, **kw)
+            got = {dim: {k: v for k, v in counts.items() if v} for dim, counts in got.items()}
+            assert got == reference_facets(df, *args), args
+
+
+def test_fuzzy_facet_counts_match_fuzzy_results(df):
+    fuzzy = FuzzyIndex(df)
+
+    def fuzzy_filter(df, *args):
+        return filters.apply_filters(df, *args, fuzzy=fuzzy)[0]
+
+    for args in random_cases(20, seed=8):
+        args = args[:6] + (args[6] or "jonh smiht",) + args[7:8]
+        got = filters.facet_counts(df, *args, fuzzy=fuzzy, version="test-fuzzy-facets")
+        got = {dim: {k: v for k, v in counts.items() if v} for dim, counts in got.items()}
+        assert got == reference_facets(df, *args, run=fuzzy_filter), args
+        assert any(got.values()) or not len(fuzzy_filter(df, *args))
+
+
+def test_result_position_matches_frame_order(df):
+    args = ({"role": "manager"}, [], [], [], [], {}, "", ["Rep A", "Wolf Carports"], "value_proxy_num", False)
+    got, _ = filters.apply_filters(df, *args, index=filters.FilterIndex(df, "v1"), version="test-position")
+    labels = got.index.to_numpy()
+    assert len(got) > 1
+    for pos in range(len(got)):
+        assert filters.result_position(got, int(labels[pos])) == pos
+    missing = sorted(set(range(len(df))) - set(labels.tolist()))[:5]
+    assert all(filters.result_position(got, label) == -1 for label in missing)
+    # Slices inherit attrs but are not the cached result
+    assert filters.result_position(got.iloc[:1], int(labels[0])) is None
+    assert filters.result_position(df, 0) is None
+
+
+def test_result_cache_evicts_on_byte_budget():
+    cache = filters.ResultCache(max_entries=100, max_bytes=4 * 1000 * 3)
+    for i in range(5):
+        stored = cache.put(("k", i), np.arange(1000, dtype=np.int64))
+        assert stored.dtype == np.int32 and not stored.flags.writeable
+    assert cache.stats()["entries"] == 3 and cache.stats()["bytes"] == 12000
+    assert cache.get(("k", 0)) is None and cache.get(("k", 4)) is not None
+    # A sorter counts against the same budget
+    assert cache.position(("k", 4), 10, 1000) == 10
+    assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == 12000
+    cache.put(("big", 0), np.arange(10000))
+    assert cache.stats()["entries"] == 1
+
+
+def test_priority_sort_ranks_every_match(df):
+    scores = PriorityScores(compute_scores(df, now=pd.Timestamp("2024-06-01")), ("test",))
+    args = ({"role": "manager"}, [], [], [], [], {}, "", ["Rep A", "Wolf Carports"], PRIORITY_SORT, True)
+    got, _ = filters.apply_filters(df, *args, priority=scores)
+    expected = reference_filter(df, *args[:8])
+    assert len(got) == len(expected) > 0
+    s = scores.scores[got.index.to_numpy()]
+    assert (np.diff(s) <= 0).all()
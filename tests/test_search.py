@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib.search import SearchIndex, substring_rows
+from tests.synth import lead_frame
+
+ROWS = 600
+QUERIES = [
+    "", "j", "jo", "joh", "john", "john smith", "smith j", "1", "33", "+1336", "5551234", "a@x", "a@x.com",
+    "@", ".", "x.com", "aus", "austin", "tx", "nan", "none", "unknown", "garcía", "o'neil", "zzz", " a ",
+]
+
+
+@pytest.fixture(scope="module")
+def df():
+    return lead_frame(ROWS)
+
+
+def test_index_matches_substring_scan(df):
+    index = SearchIndex(df)
+    # Typed in order, so later terms also go through the narrowed term cache
+    for q in QUERIES:
+        q = q.strip().lower()
+        expected = substring_rows(df, q) if q else np.arange(len(df))
+        np.testing.assert_array_equal(index.match(q, df), expected, err_msg=q)
+
+
+def test_match_within_subset(df):
+    index = SearchIndex(df)
+    within = np.arange(0, len(df), 3)
+    for q in ["john", "336", "a@x", "smith j"]:
+        expected = within[substring_rows(df.take(within), q)]
+        np.testing.assert_array_equal(index.match(q, df, within=within), expected, err_msg=q)
+
+
+def test_common_and_rare_terms_on_a_wide_vocabulary():
+    # Unique emails and phones per row, so common terms take the dense paths and rare ones the gather
+    n = 400
+    df = pd.DataFrame({
+        "display_name": [f"Lead {i % 7} Name{i}" for i in range(n)],
+        "primary_email": [f"user{i}@mail{i % 5}.com" for i in range(n)],
+        "city": ["Austin", "Raleigh"] * (n // 2),
+        "state": ["TX", "NC", "VA", "GA"] * (n // 4),
+        "all_phones": [[f"+1336555{i:04d}", f"+1919555{i * 7 % 10000:04d}"] for i in range(n)],
+    })
+    index = SearchIndex(df)
+    for q in ["1", "a", "5", "mail", "user1", "name39", "+13365550123", "lead 3 name", "zzz"]:
+        np.testing.assert_array_equal(index.match(q, df), substring_rows(df, q), err_msg=q)